@@ -1,35 +1,153 @@
 # api/deps.py
+import secrets
+from typing import Optional
 
-from fastapi import Depends, HTTPException, status
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-
-from db.base import get_db
-from db import models
+from fastapi import Depends, Header, HTTPException, Request, status
+from jose import JWTError
+from db.base import AnySession, get_read_session, get_session
+from db.replicas import mark_write
+from crud import async_crud_user
 from core import security, config
+from core.kdf import KDFSaturated
+from core.rate_limit import consume, get_limiters, retry_after_header
+from core.principal import (
+    Principal,
+    decode_token,
+    get_cached_principal,
+    principal_from_claims,
+    remember_principal,
+)
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(security.oauth2_scheme)
-):
-    credentials_exception = HTTPException(
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+async def run_kdf(call):
+    """Espera el hash/verificación y traduce la saturación del ejecutor KDF a 503."""
     try:
-        payload = jwt.decode(
-            token, config.settings.SECRET_KEY, algorithms=[config.settings.ALGORITHM]
+        return await call
+    except KDFSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiadas solicitudes de autenticación, intenta nuevamente",
+            headers={"Retry-After": "1"},
+        )
+
+
+def client_ip(request: Request) -> str:
+    if config.settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "desconocido"
+
+
+async def enforce_rate_limit(**keys: str) -> None:
+    """
+    Consume una ficha de cada limitador (alcance=clave), solo si todos
+    tienen, y responde 429 con Retry-After si alguno está vacío. Va antes de
+    tocar la base o el KDF.
+    """
+    if not config.settings.RATE_LIMIT_ENABLED:
+        return
+    limiters = get_limiters()
+    retry_after = await consume(
+        [(limiters[scope], key) for scope, key in keys.items()]
+    )
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiados intentos, intenta más tarde",
+            headers={"Retry-After": retry_after_header(retry_after)},
         )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
 
+
+def get_token_payload(token: str = Depends(security.oauth2_scheme)) -> dict:
+    try:
+        payload = decode_token(token)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    # Los refresh tokens solo sirven en /auth/refresh; los tokens sin "type"
+    # (formato anterior, incluidos refresh de 7 días) ya no se aceptan
+    if payload.get("type") != security.ACCESS:
+        raise _credentials_exception()
+    return payload
+
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_current_user(
+    db: AnySession = Depends(get_session), payload: dict = Depends(get_token_payload)
+):
+    """Fila completa del usuario (para /auth/me y lo que necesite el ORM)."""
+    user = await async_crud_user.get_user_by_email(db, payload["sub"])
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
+
+
+async def get_current_principal(
+    db: AnySession = Depends(get_session), payload: dict = Depends(get_token_payload)
+) -> Principal:
+    """
+    Identidad liviana del usuario autenticado. En un acierto de caché no
+    verifica de nuevo el JWT ni consulta `users`.
+    """
+    email, exp = payload["sub"], payload.get("exp")
+    principal = get_cached_principal(email, exp)
+    if principal is not None:
+        return principal
+
+    row = await async_crud_user.get_principal_row(db, email)
+    if not row:
+        raise _credentials_exception()
+    principal = Principal(*row)
+    remember_principal(email, exp, principal)
+    return principal
+
+
+def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    """Protege los endpoints /admin con la clave ADMIN_API_KEY."""
+    expected = config.settings.ADMIN_API_KEY
+    if not expected:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin API deshabilitada"
+        )
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Clave de administración inválida"
+        )
+
+
+async def get_claims_principal(
+    db: AnySession = Depends(get_session), payload: dict = Depends(get_token_payload)
+) -> Principal:
+    """
+    Principal desde los claims de perfil del token (AUTH_PROFILE_CLAIMS), sin
+    tocar `users`; los tokens sin esos claims usan get_current_principal.
+    """
+    principal = principal_from_claims(payload)
+    if principal is not None:
+        return principal
+    return await get_current_principal(db, payload)
+
+
+async def get_read_db(user: Principal = Depends(get_claims_principal)):
+    """Sesión de lectura (réplica o primario, ver db/replicas.py) para las rutas GET."""
+    async for db in get_read_session(user.id):
+        yield db
+
+
+async def get_write_db(
+    db: AnySession = Depends(get_session),
+    user: Principal = Depends(get_claims_principal),
+):
+    """Sesión del primario que abre la ventana de read-your-writes del usuario."""
+    mark_write(user.id)
+    yield db
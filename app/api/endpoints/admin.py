@@ -0,0 +1,154 @@
+# api/endpoints/admin.py
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from api.deps import require_admin
+from core.config import settings
+from core.kdf import get_kdf_executor
+from core.rate_limit import rate_limit_stats
+from db.base import get_replica_set
+from db.pool import pool_stats
+from core.principal import cache_stats
+from ml.executor import get_inference_executor
+from ml.monitoring import drift_report, load_reference, merge_snapshots, read_snapshots
+from ml.predictor import get_predictor, load_report, monitor_snapshot_dir, registry
+
+router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
+
+
+def _process_mode() -> bool:
+    return settings.ML_EXECUTOR_MODE == "process"
+
+
+def _snapshots() -> list:
+    """Snapshots recientes de todos los procesos que sirven el modelo."""
+    directory = monitor_snapshot_dir()
+    if not directory:
+        return []
+    return read_snapshots(
+        directory, max_age=3 * settings.ML_MONITOR_SNAPSHOT_SECONDS
+    )
+
+
+@router.get("/inference")
+def inference_stats():
+    """
+    Modelo activo, caché de predicciones, micro-lotes y ejecutor de inferencia.
+    En modo "process" el modelo vive en los procesos de inferencia: se leen
+    sus snapshots (hasta ML_MONITOR_SNAPSHOT_SECONDS de atraso) en lugar de
+    cargar otro modelo en este worker.
+    """
+    if _process_mode():
+        return {
+            "processes": [
+                {"pid": s["pid"], "taken_at": s["taken_at"], **s.get("process", {})}
+                for s in _snapshots()
+            ],
+            "executor": get_inference_executor().stats(),
+        }
+    predictor = get_predictor()
+    return {
+        **predictor.stats(),
+        "load": load_report,
+        "executor": get_inference_executor().stats(),
+    }
+
+
+@router.get("/inference/drift")
+def inference_drift(merged: bool = False):
+    """
+    Histogramas de features, probabilidad y latencia con el PSI frente a la
+    referencia. Con merged=true combina los snapshots recientes de todos los
+    procesos en lugar de solo este worker; en modo "process" siempre se
+    combinan los de los procesos de inferencia.
+    """
+    if not settings.ML_MONITORING_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Monitoreo deshabilitado"
+        )
+    if _process_mode():
+        snapshot = merge_snapshots(_snapshots())
+        if snapshot is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Sin snapshots de los procesos de inferencia",
+            )
+        reference = load_reference(settings.ML_DRIFT_REFERENCE_PATH)
+        return {**snapshot, "psi": drift_report(snapshot, reference)}
+    monitor = get_predictor().monitor
+    snapshot = monitor.snapshot()
+    snapshot.pop("process", None)
+    if merged:
+        # Los archivos de este proceso pueden estar atrasados: se usa el estado vivo
+        others = [s for s in _snapshots() if s["pid"] != snapshot["pid"]]
+        snapshot = merge_snapshots([snapshot] + others)
+    return {**snapshot, "psi": drift_report(snapshot, monitor.reference)}
+
+
+@router.get("/auth")
+def auth_cache_stats():
+    """Cachés de tokens verificados e identidades de este worker."""
+    return cache_stats()
+
+
+@router.get("/kdf")
+def kdf_stats():
+    """Cola, esperas y tiempo de hash del ejecutor de contraseñas de este worker."""
+    return get_kdf_executor().stats()
+
+
+@router.get("/rate-limits")
+def rate_limits():
+    """Baldes y contadores de los limitadores de /auth/token y /users de este worker."""
+    return rate_limit_stats()
+
+
+@router.get("/db/pool")
+def db_pool_stats():
+    """Pools de conexiones de este worker: tamaño, en uso, desborde, esperas e invalidaciones."""
+    return pool_stats()
+
+
+@router.get("/db/replicas")
+def db_replica_stats():
+    """Lecturas por réplica, fallos, lecturas al primario y ventana de read-your-writes."""
+    return get_replica_set().stats()
+
+
+@router.get("/models")
+def list_models():
+    """
+    Versión activa en este worker (en modo "process", las que sirven los
+    procesos de inferencia), manifiesto del registro y estado del último cambio.
+    """
+    if _process_mode():
+        versions = {s.get("process", {}).get("model_version") for s in _snapshots()}
+        active = sorted(versions - {None})
+    else:
+        active = get_predictor().model_version
+    return {
+        "active": active,
+        "manifest": registry.manifest(),
+        "swap": registry.status,
+    }
+
+
+@router.post("/models/{version}/activate", status_code=status.HTTP_202_ACCEPTED)
+def activate_model(version: str):
+    """
+    Marca la versión como activa en el manifiesto y la carga en segundo
+    plano; el resto de workers (y los procesos de inferencia) la toman al
+    revisar el manifiesto.
+    """
+    try:
+        if _process_mode():
+            registry.set_active(version)
+        else:
+            registry.activate(get_predictor(), version)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Versión no registrada"
+        )
+    return {"target": version, "swap": registry.status}
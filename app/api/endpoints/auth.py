@@ -1,18 +1,20 @@
 # api/endpoints/auth.py
 
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from db.base import get_db
+from jose import JWTError
+from db.base import AnySession, get_session
 from schemas import schemas
-from crud import crud_user
+from crud import async_crud_user
 from core import security
-from api.deps import get_current_user
+from api.deps import client_ip, enforce_rate_limit, get_current_user, run_kdf
+from core.kdf import get_kdf_executor
 from db import models
 from core.security import generate_tokens
 import logging
 import time
+from datetime import datetime, timezone
 
 logger = logging.getLogger("auth_endpoint")
 
@@ -20,13 +22,28 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+async def login_for_access_token(
+    request: Request,
+    db: AnySession = Depends(get_session),
+    form_data: OAuth2PasswordRequestForm = Depends(),
 ):
     start_time = time.time()
-    user = crud_user.get_user_by_email(db, email=form_data.username)
-    if not user or not security.verify_password(
-        form_data.password, user.hashed_password
+    try:
+        await enforce_rate_limit(
+            login_ip=client_ip(request),
+            login_account=form_data.username.strip().lower(),
+        )
+    except HTTPException:
+        logger.warning(
+            "Login limitado: usuario=%s | IP: %s | Path: /api/v1/auth/token",
+            form_data.username,
+            client_ip(request),
+        )
+        raise
+    # El KDF va a su ejecutor acotado (core/kdf.py)
+    user = await async_crud_user.get_user_by_email(db, email=form_data.username)
+    if not user or not await run_kdf(
+        get_kdf_executor().verify_password(form_data.password, user.hashed_password)
     ):
         elapsed = (time.time() - start_time) * 1000
         logger.warning(
@@ -39,7 +56,9 @@ def login_for_access_token(
             detail="Correo o contraseña incorrectos",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token, refresh_token = generate_tokens(user.email)
+    access_token, refresh_token = generate_tokens(
+        user.email, security.profile_claims(user)
+    )
     elapsed = (time.time() - start_time) * 1000
     logger.info(
         "Login exitoso: usuario=%s | Tiempo: %.2f ms | Path: /api/v1/auth/token",
@@ -53,6 +72,50 @@ def login_for_access_token(
     }
 
 
+def _refresh_rejected(reason) -> HTTPException:
+    logger.warning("Refresh rechazado: %s | Path: /api/v1/auth/refresh", reason)
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token inválido o ya utilizado",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+@router.post("/refresh", response_model=schemas.Token)
+async def refresh_access_token(
+    refresh_in: schemas.RefreshRequest, db: AnySession = Depends(get_session)
+):
+    """
+    Renueva la sesión con el refresh token, sin contraseña ni KDF: verifica
+    la firma, recarga el usuario (los claims de perfil salen de la fila
+    actual) y marca el token como usado en la base, así que cada refresh
+    token sirve una sola vez en todos los workers (rotación).
+    """
+    start_time = time.time()
+    try:
+        payload = security.decode_refresh_token(refresh_in.refresh_token)
+    except JWTError as exc:
+        raise _refresh_rejected(exc)
+    user = await async_crud_user.get_user_by_email(db, payload["sub"])
+    if not user:
+        raise _refresh_rejected("usuario inexistente")
+    expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    if not await async_crud_user.consume_refresh_jti(db, payload["jti"], expires_at):
+        raise _refresh_rejected("refresh token ya utilizado")
+    access_token, refresh_token = generate_tokens(
+        user.email, security.profile_claims(user)
+    )
+    elapsed = (time.time() - start_time) * 1000
+    logger.info(
+        "Sesión renovada | Tiempo: %.2f ms | Path: /api/v1/auth/refresh", elapsed
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
 @router.get("/me", response_model=schemas.UserResponse)
-def read_current_user(current_user: models.User = Depends(get_current_user)):
+async def read_current_user(current_user: models.User = Depends(get_current_user)):
     return current_user
@@ -2,14 +2,15 @@
 import time
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from db.base import get_db
-from db import models
+from db.base import AnySession, get_db, get_session
 from schemas import schemas
-from crud import crud_evaluation
-from ml.predictor import predictor
-from api.deps import get_current_user
+from crud import async_crud_evaluation, crud_evaluation
+from ml.executor import InferenceSaturated, InferenceTimeout, get_inference_executor
+from api.deps import get_claims_principal, get_read_db, get_write_db
+from core.principal import Principal
 
 router = APIRouter(prefix="/evaluations", tags=["evaluations"])
 
@@ -17,6 +18,54 @@ router = APIRouter(prefix="/evaluations", tags=["evaluations"])
 logger = logging.getLogger("evaluations_endpoint")
 
 
+async def _run_inference(call):
+    """Espera la inferencia y traduce saturación/timeout del ejecutor a HTTP."""
+    try:
+        return await call
+    except InferenceSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servicio de evaluación saturado, intenta nuevamente",
+            headers={"Retry-After": "1"},
+        )
+    except InferenceTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="La evaluación tardó demasiado",
+        )
+
+
+# Feature del modelo detrás de cada factor de riesgo (icon_key)
+_FACTOR_FEATURES = {
+    "bmi": "BMI",
+    "smoking": "Smoker",
+    "sedentary": "PhysActivity",
+    "cholesterol": "HighChol",
+    "diabetes": "Diabetes",
+    "alcohol": "Alcohol",
+    "salt": "Salt",
+    "stress": "MentHlth",
+    "vaping": "Vaper",
+}
+
+
+def _rank_by_contribution(risk_factors: list, contributions: Optional[dict]) -> list:
+    """
+    Ordena los factores por lo que el modelo les atribuyó en esta evaluación
+    (contribuciones guardadas al crearla); sin ellas se conserva el orden fijo.
+    """
+    if not contributions:
+        return risk_factors
+    for factor in risk_factors:
+        factor["contribution"] = contributions.get(_FACTOR_FEATURES[factor["icon_key"]])
+    ranked = sorted(
+        risk_factors, key=lambda f: f["contribution"] or 0.0, reverse=True
+    )
+    for factor_id, factor in enumerate(ranked, start=1):
+        factor["id"] = factor_id
+    return ranked
+
+
 def _bmi_category_from_imc(imc: Optional[float]) -> str:
     if imc is None:
         return "Desconocido"
@@ -36,55 +85,198 @@ def _bmi_category_from_imc(imc: Optional[float]) -> str:
 @router.post(
     "/", response_model=schemas.EvaluationResponse, status_code=status.HTTP_201_CREATED
 )
-def create_new_evaluation(
+async def create_new_evaluation(
     evaluation_in: schemas.EvaluationCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AnySession = Depends(get_write_db),
+    current_user: Principal = Depends(get_claims_principal),
 ):
     start_time = time.time()
 
     user_data = {"birth_date": current_user.birth_date, "gender": current_user.gender}
 
-    probability, risk_level, imc, age = predictor.predict(
-        user_data=user_data, evaluation_data=evaluation_in
+    prediction = await _run_inference(
+        get_inference_executor().predict(user_data, evaluation_in)
     )
 
-    db_evaluation = crud_evaluation.create_evaluation(
-        db=db,
+    db_evaluation = await async_crud_evaluation.create_evaluation(
+        db,
         user_id=current_user.id,
         evaluation_in=evaluation_in,
-        probability=probability,
-        risk_level=risk_level,
-        imc=imc,
-        age=age,
+        probability=prediction.probability,
+        risk_level=prediction.risk_level,
+        imc=prediction.imc,
+        age=prediction.age,
+        model_version=prediction.model_version,
+        feature_contributions=prediction.contributions,
     )
     elapsed = (time.time() - start_time) * 1000  # ms
     logger.info(
         "Evaluación de riesgo generada: usuario=%s, resultado=%s | Tiempo: %.2f ms | Path: /api/v1/evaluations/",
         current_user.id,
-        risk_level,
+        prediction.risk_level,
         elapsed,
     )
     return db_evaluation
 
 
+@router.post(
+    "/batch",
+    response_model=schemas.EvaluationBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_evaluations_batch(
+    batch_in: schemas.EvaluationBatchCreate,
+    db: AnySession = Depends(get_write_db),
+    current_user: Principal = Depends(get_claims_principal),
+):
+    """
+    Crea varias evaluaciones con una sola llamada al modelo y un solo commit.
+    Los ítems inválidos se reportan en `errors` sin abortar el resto del lote.
+    """
+    start_time = time.time()
+
+    valid, errors = [], []
+    for index, raw in enumerate(batch_in.items):
+        try:
+            valid.append(schemas.EvaluationCreate.model_validate(raw))
+        except ValidationError as exc:
+            errors.append({"index": index, "detail": str(exc)})
+
+    created = []
+    if valid:
+        user_data = {
+            "birth_date": current_user.birth_date,
+            "gender": current_user.gender,
+        }
+        predictions = await _run_inference(
+            get_inference_executor().predict_batch(
+                [(user_data, evaluation_in) for evaluation_in in valid]
+            )
+        )
+        created = await async_crud_evaluation.create_evaluations_bulk(
+            db,
+            user_id=current_user.id,
+            entries=list(zip(valid, predictions)),
+        )
+
+    elapsed = (time.time() - start_time) * 1000  # ms
+    logger.info(
+        "Lote de evaluaciones generado: usuario=%s, creadas=%s, errores=%s | Tiempo: %.2f ms | Path: /api/v1/evaluations/batch",
+        current_user.id,
+        len(created),
+        len(errors),
+        elapsed,
+    )
+    return {"created": created, "errors": errors}
+
+
+def _apply_changes(
+    base: dict, changes: schemas.EvaluationChanges
+) -> schemas.EvaluationCreate:
+    data = dict(base)
+    data.update(
+        changes.model_dump(exclude_none=True, exclude={"label", "weight_delta_kg"})
+    )
+    if changes.weight_delta_kg is not None:
+        data["weight_kg"] = data["weight_kg"] + changes.weight_delta_kg
+    return schemas.EvaluationCreate.model_validate(data)
+
+
+@router.post("/simulate", response_model=schemas.SimulationResponse)
+async def simulate_evaluation(
+    simulation_in: schemas.SimulationRequest,
+    db: AnySession = Depends(get_session),
+    current_user: Principal = Depends(get_claims_principal),
+):
+    """
+    Evalúa escenarios hipotéticos ("¿y si dejo de fumar / bajo 5 kg?") sobre
+    la última evaluación del usuario. La evaluación de referencia y todas las
+    variantes se puntúan en un solo lote con el modelo actual; no se guarda nada.
+    """
+    start_time = time.time()
+
+    evaluation = await async_crud_evaluation.get_last_evaluation_by_user(
+        db, user_id=current_user.id
+    )
+    if not evaluation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No evaluation found"
+        )
+
+    base = {
+        field: getattr(evaluation, field)
+        for field in schemas.EvaluationCreate.model_fields
+    }
+    variants = [schemas.EvaluationCreate.model_validate(base)]
+    for index, changes in enumerate(simulation_in.scenarios):
+        try:
+            variants.append(_apply_changes(base, changes))
+        except ValidationError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"index": index, "detail": str(exc)},
+            )
+
+    user_data = {"birth_date": current_user.birth_date, "gender": current_user.gender}
+    predictions = await _run_inference(
+        get_inference_executor().predict_batch(
+            [(user_data, variant) for variant in variants]
+        )
+    )
+
+    baseline = predictions[0]
+    labels = [None] + [changes.label for changes in simulation_in.scenarios]
+    applied = [{}] + [
+        changes.model_dump(exclude_none=True, exclude={"label"}, mode="json")
+        for changes in simulation_in.scenarios
+    ]
+    results = [
+        {
+            "label": label,
+            "changes": changes,
+            "probability": prediction.probability,
+            "risk_level": prediction.risk_level,
+            "imc": prediction.imc,
+            "delta": prediction.probability - baseline.probability,
+        }
+        for label, changes, prediction in zip(labels, applied, predictions)
+    ]
+
+    elapsed = (time.time() - start_time) * 1000  # ms
+    logger.info(
+        "Simulación de escenarios: usuario=%s, escenarios=%s | Tiempo: %.2f ms | Path: /api/v1/evaluations/simulate",
+        current_user.id,
+        len(simulation_in.scenarios),
+        elapsed,
+    )
+    return {
+        "evaluation_id": evaluation.id,
+        "model_version": baseline.model_version,
+        "baseline": results[0],
+        "scenarios": results[1:],
+    }
+
+
 @router.get("/", response_model=List[schemas.EvaluationResponse])
-def read_user_evaluations(
-    db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
+async def read_user_evaluations(
+    db: AnySession = Depends(get_read_db),
+    current_user: Principal = Depends(get_claims_principal),
 ):
     """
     Obtiene el historial de evaluaciones del usuario autenticado.
     """
-    evaluations = crud_evaluation.get_evaluations_by_user(db, user_id=current_user.id)
+    evaluations = await async_crud_evaluation.get_evaluations_by_user(
+        db, user_id=current_user.id
+    )
     return evaluations
 
 
 @router.get("/me", response_model=schemas.ProfileSummary)
-def read_my_latest_evaluation(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+async def read_my_latest_evaluation(
+    db: AnySession = Depends(get_read_db),
+    current_user: Principal = Depends(get_claims_principal),
 ):
-    evaluation = crud_evaluation.get_last_evaluation_by_user(
+    evaluation = await async_crud_evaluation.get_last_evaluation_by_user(
         db, user_id=current_user.id
     )
     if not evaluation:
@@ -276,6 +468,10 @@ def read_my_latest_evaluation(
             }
         )
 
+    risk_factors = _rank_by_contribution(
+        risk_factors, getattr(evaluation, "feature_contributions", None)
+    )
+
     return {
         "age": getattr(evaluation, "age", None),
         "gender": gender,
@@ -290,7 +486,7 @@ def read_my_latest_evaluation(
 def create_pressure(
     pressure_in: schemas.BPCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_claims_principal),
 ):
     start_time = time.time()
 
@@ -1,11 +1,11 @@
 # api/endpoints/pressures.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
 
-from api.deps import get_db, get_current_user
+from api.deps import get_claims_principal, get_read_db, get_write_db
+from db.base import AnySession
 from schemas.schemas import BPCreate, BPOut, BPList
-from crud.crud_pressure import create_for_user, get_last, get_list, delete_one
+from crud.async_crud_pressure import create_for_user, get_last, get_list, delete_one
 import time
 import logging
 
@@ -15,10 +15,12 @@ router = APIRouter(prefix="/pressures", tags=["pressures"])
 
 
 @router.post("", response_model=BPOut)
-def create_pressure(
-    data: BPCreate, db: Session = Depends(get_db), user=Depends(get_current_user)
+async def create_pressure(
+    data: BPCreate,
+    db: AnySession = Depends(get_write_db),
+    user=Depends(get_claims_principal),
 ):
-    pressure = create_for_user(db, user.id, data)
+    pressure = await create_for_user(db, user.id, data)
     logger.info(
         "Presión registrada: usuario=%s, sistólica=%s, diastólica=%s",
         user.id,
@@ -29,15 +31,15 @@ def create_pressure(
 
 
 @router.get("", response_model=BPList)
-def list_pressures(
+async def list_pressures(
     page: int = Query(1, ge=1, description="Número de página"),
     limit: int = Query(5, ge=1, le=100, description="Registros por página"),
-    db: Session = Depends(get_db),
-    user=Depends(get_current_user),
+    db: AnySession = Depends(get_read_db),
+    user=Depends(get_claims_principal),
 ):
     start_time = time.time()
     skip = (page - 1) * limit
-    items, total = get_list(db, user.id, skip, limit)
+    items, total = await get_list(db, user.id, skip, limit)
     elapsed = (time.time() - start_time) * 1000  # ms
     logger.info(
         "Historial consultado: usuario=%s | Página=%s | Registros=%s | Tiempo: %.2f ms | Path: /api/v1/pressures",
@@ -50,14 +52,18 @@ def list_pressures(
 
 
 @router.get("/last", response_model=BPOut | None)
-def last_pressure(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    return get_last(db, user.id)
+async def last_pressure(
+    db: AnySession = Depends(get_read_db), user=Depends(get_claims_principal)
+):
+    return await get_last(db, user.id)
 
 
 @router.delete("/{bp_id}", status_code=204)
-def remove_pressure(
-    bp_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)
+async def remove_pressure(
+    bp_id: int,
+    db: AnySession = Depends(get_write_db),
+    user=Depends(get_claims_principal),
 ):
-    ok = delete_one(db, user.id, bp_id)
+    ok = await delete_one(db, user.id, bp_id)
     if not ok:
         raise HTTPException(status_code=404, detail="not found")
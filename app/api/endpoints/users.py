@@ -1,30 +1,40 @@
 # api/endpoints/users.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
-from db.base import get_db
+from db.base import AnySession, get_session
 from schemas import schemas
-from crud import crud_user
-from core.security import generate_tokens
+from crud import async_crud_user
+from core.security import generate_tokens, profile_claims
+from core.kdf import get_kdf_executor
+from api.deps import client_ip, enforce_rate_limit, run_kdf
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.post("/", response_model=schemas.Token, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(
+    request: Request, user: schemas.UserCreate, db: AnySession = Depends(get_session)
+):
+    await enforce_rate_limit(signup_ip=client_ip(request))
 
-    exists = crud_user.get_user_by_email(db, email=user.email)
+    exists = await async_crud_user.get_user_by_email(db, email=user.email)
     if exists:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El correo electrónico ya está registrado.",
         )
 
-    new_user = crud_user.create_user(db=db, user=user)
+    # El hash corre en el ejecutor KDF, no en el threadpool compartido
+    hashed_password = await run_kdf(get_kdf_executor().hash_password(user.password))
+    new_user = await async_crud_user.create_user(
+        db, user=user, hashed_password=hashed_password
+    )
 
     # ✅ Usar función auxiliar para generar tokens
-    access_token, refresh_token = generate_tokens(new_user.email)
+    access_token, refresh_token = generate_tokens(
+        new_user.email, profile_claims(new_user)
+    )
 
     return {
         "access_token": access_token,
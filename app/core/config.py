@@ -1,24 +1,135 @@
 # core/config.py
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Optional
 from pathlib import Path
 import os
 
 ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
+MODELS_DIR = Path(__file__).resolve().parent.parent / "ml" / "models"
 
 class Settings(BaseSettings):
-    # Cloud SQL Connection Name
-    CLOUD_SQL_CONNECTION_NAME: str
+    # Backend de base de datos (db/base.py): "cloudsql" (Cloud SQL Connector),
+    # "postgres" (DATABASE_URL o DB_HOST/DB_PORT con las credenciales de abajo)
+    # o "sqlite" (DATABASE_URL, por defecto ./atension.db, para pruebas locales)
+    DB_BACKEND: str = "cloudsql"
+    DATABASE_URL: Optional[str] = None
+    DB_HOST: str = "localhost"
+    DB_PORT: int = 5432
+
+    # Cloud SQL Connection Name (obligatorio con DB_BACKEND=cloudsql)
+    CLOUD_SQL_CONNECTION_NAME: Optional[str] = None
     
     # Database credentials
-    DB_USER: str
-    DB_PASSWORD: str
-    DB_NAME: str
+    DB_USER: Optional[str] = None
+    DB_PASSWORD: Optional[str] = None
+    DB_NAME: Optional[str] = None
+    # Capa de datos async (AsyncSession sobre asyncpg): las rutas esperan a la
+    # base en el event loop. Deshabilitado = Session síncrona en el threadpool.
+    DB_ASYNC: bool = False
+    # Pool de conexiones (db/pool.py). DB_POOL_PRE_PING: "always" (un ping por
+    # checkout), "idle" (solo tras DB_POOL_PING_IDLE_SECONDS sin uso) o "never"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: str = "always"
+    DB_POOL_PING_IDLE_SECONDS: float = 30.0
+    # Migraciones (db/migrate.py) al arrancar: "check" (falla si el esquema está
+    # atrasado), "upgrade" (aplica las pendientes, para desarrollo) u "off"
+    DB_MIGRATIONS_ON_STARTUP: str = "check"
+    # Réplicas de lectura (db/replicas.py): URLs o connection names de Cloud SQL
+    # separados por coma; None = todas las lecturas al primario. Tras una
+    # escritura, las lecturas del mismo usuario van al primario durante
+    # DB_READ_YOUR_WRITES_SECONDS (por proceso).
+    DB_READ_REPLICAS: Optional[str] = None
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+    DB_READ_YOUR_WRITES_MAX_USERS: int = 100000
     
     # JWT Configuration
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Caché por proceso de tokens verificados e identidades (core/principal.py);
+    # 0 = deshabilitada. El TTL acota cuánto tarda otro worker en ver un cambio.
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    # Incluye uid, birth_date y gender en los tokens: las rutas de evaluación y
+    # presión arman el Principal sin consultar `users`. Un cambio de perfil se
+    # refleja al emitir el siguiente token.
+    AUTH_PROFILE_CLAIMS: bool = False
+    # Ejecutor dedicado al hash/verificación de contraseñas (core/kdf.py): hilos
+    # y llamadas en curso o en cola antes de responder 503
+    AUTH_KDF_WORKERS: int = 2
+    AUTH_KDF_MAX_PENDING: int = 32
+    # Token bucket por IP y por cuenta antes de /auth/token y /users
+    # (core/rate_limit.py): ráfaga permitida y recarga por minuto. En memoria
+    # por proceso; con RATE_LIMIT_REDIS_URL se comparte entre workers.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_IP_BURST: int = 20
+    RATE_LIMIT_LOGIN_IP_PER_MINUTE: float = 10.0
+    RATE_LIMIT_LOGIN_ACCOUNT_BURST: int = 5
+    RATE_LIMIT_LOGIN_ACCOUNT_PER_MINUTE: float = 2.0
+    RATE_LIMIT_SIGNUP_IP_BURST: int = 5
+    RATE_LIMIT_SIGNUP_IP_PER_MINUTE: float = 2.0
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Toma la IP del cliente de X-Forwarded-For (solo detrás de un proxy confiable)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+
+    # Registro de modelos (ml/registry.py): directorio con manifest.json y
+    # cada cuántos segundos cada worker revisa la versión activa (0 = no revisa)
+    ML_MODELS_DIR: str = str(MODELS_DIR)
+    ML_REGISTRY_POLL_SECONDS: float = 10.0
+
+    # Inferencia: "sklearn" (predict_proba) o "compiled" (ml/compiled_forest.py)
+    ML_INFERENCE_ENGINE: str = "sklearn"
+    # Caché de predicciones por vector codificado (0 = deshabilitada)
+    ML_CACHE_SIZE: int = 4096
+    ML_CACHE_TTL_SECONDS: Optional[float] = 3600
+    # Carga del modelo: mmap de solo lectura y carga al arrancar (por defecto, en la 1ª petición).
+    # Con el motor "compiled" los arreglos del forest se publican como .npy junto
+    # al modelo y todos los workers comparten sus páginas. Con "sklearn" el mmap
+    # solo evita el buffer del pickle: Tree.__setstate__ copia los árboles, así
+    # que cada worker mantiene su copia privada (unos 35 MB con el forest de
+    # 100 árboles de profundidad 12, frente a ~70 MB sin mmap).
+    ML_MODEL_MMAP: bool = True
+    ML_EAGER_LOAD: bool = False
+    # Micro-lotes: agrupa peticiones concurrentes en una sola llamada al modelo
+    ML_BATCHING_ENABLED: bool = False
+    ML_BATCH_WINDOW_MS: float = 3.0
+    ML_BATCH_MAX_SIZE: int = 64
+    # Ejecutor de inferencia: "inline" (threadpool de Starlette), "thread" o "process"
+    ML_EXECUTOR_MODE: str = "inline"
+    ML_EXECUTOR_WORKERS: int = 2
+    ML_EXECUTOR_MAX_PENDING: int = 64
+    ML_EXECUTOR_TIMEOUT_SECONDS: Optional[float] = 5.0
+    # Tabla de riesgo precalculada (python -m ml.risk_table); None = deshabilitada
+    ML_RISK_TABLE_PATH: Optional[str] = None
+    # Variantes ligeras registradas con ml/tiers.py: tier a servir (None = el de
+    # referencia) y tier de respaldo al que se degrada cuando el ejecutor tiene
+    # ML_FALLBACK_AT_PENDING llamadas pendientes (None = la mitad de
+    # ML_EXECUTOR_MAX_PENDING); el respaldo corre en el mismo ejecutor.
+    ML_MODEL_TIER: Optional[str] = None
+    ML_FALLBACK_TIER: Optional[str] = None
+    ML_FALLBACK_AT_PENDING: Optional[int] = None
+    # Contribución de cada feature a la probabilidad, guardada con la evaluación
+    # (opt-in). Recorre el forest completo para cada fila que no esté en caché
+    # (también en los aciertos de la tabla de riesgo) y, con el motor sklearn,
+    # mantiene una copia compilada del modelo por proceso.
+    ML_FEATURE_CONTRIBUTIONS: bool = False
+    # Monitoreo de drift (ml/monitoring.py): histogramas en memoria, snapshot
+    # periódico por proceso en ML_MONITOR_SNAPSHOT_DIR (None = sin snapshots)
+    # y distribución de referencia para el PSI
+    ML_MONITORING_ENABLED: bool = True
+    ML_MONITOR_SNAPSHOT_DIR: Optional[str] = None
+    ML_MONITOR_SNAPSHOT_SECONDS: float = 60.0
+    ML_DRIFT_REFERENCE_PATH: Optional[str] = None
+
+    # Clave para los endpoints /admin (cabecera X-Admin-Key); sin clave quedan deshabilitados
+    ADMIN_API_KEY: Optional[str] = None
 
     model_config = SettingsConfigDict(
         env_file=str(ENV_PATH),
@@ -0,0 +1,135 @@
+# core/kdf.py
+"""
+Ejecutor acotado para el hash y la verificación de contraseñas.
+
+pbkdf2_sha256 tarda cientos de ms de CPU por llamada; en el threadpool
+compartido de Starlette una ráfaga de logins o registros ocupa todos sus
+hilos y frena rutas que no tienen nada que ver (/pressures, /auth/me). Aquí
+el KDF corre en un ThreadPoolExecutor propio con AUTH_KDF_WORKERS hilos y a
+lo sumo AUTH_KDF_MAX_PENDING llamadas en curso o en cola; al llenarse se
+rechaza de inmediato (KDFSaturated -> 503 con Retry-After) en vez de encolar
+sin límite. Sus métricas (cola, espera y tiempo de hash) se exponen en
+/admin/kdf, aparte de las de la API.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from core import security
+from core.config import settings
+from core.metrics import Histogram
+
+logger = logging.getLogger("kdf_executor")
+
+KDF_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+
+class KDFSaturated(Exception):
+    """La cola del KDF está llena."""
+
+
+class KDFExecutor:
+    def __init__(self, max_workers: int = 2, max_pending: int = 32):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="kdf"
+        )
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.wait_ms = Histogram(KDF_BUCKETS_MS)
+        self.hash_ms = Histogram(KDF_BUCKETS_MS)
+
+    def _timed(self, fn, args, queued_at: float):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.wait_ms.observe((started - queued_at) * 1000)
+                self.hash_ms.observe(elapsed)
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise KDFSaturated()
+            self.pending += 1
+        try:
+            future = self._pool.submit(self._timed, fn, args, time.perf_counter())
+        except Exception:
+            self._release(None)
+            raise
+        # La ranura se libera cuando el hash termina o se descarta de la cola,
+        # no cuando el cliente que lo espera se desconecta
+        future.add_done_callback(self._release)
+        try:
+            result = await asyncio.wrap_future(future)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    async def hash_password(self, password: str) -> str:
+        return await self._submit(security.get_password_hash, password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(
+            security.verify_password, plain_password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "wait_ms": self.wait_ms.snapshot(),
+                "hash_ms": self.hash_ms.snapshot(),
+            }
+
+
+_executor: Optional[KDFExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_kdf_executor() -> KDFExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = KDFExecutor(
+                    max_workers=settings.AUTH_KDF_WORKERS,
+                    max_pending=settings.AUTH_KDF_MAX_PENDING,
+                )
+                logger.info(
+                    "Ejecutor KDF: hilos=%d, cola=%d",
+                    _executor.max_workers,
+                    _executor.max_pending,
+                )
+    return _executor
+
+
+def shutdown_kdf_executor() -> None:
+    if _executor is not None:
+        _executor.shutdown()
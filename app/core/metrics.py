@@ -0,0 +1,30 @@
+# core/metrics.py
+from typing import List
+
+
+class Histogram:
+    """Histograma de buckets fijos (límites superiores inclusivos + "+Inf")."""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # último = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+        }
@@ -0,0 +1,105 @@
+# core/principal.py
+"""
+Identidad autenticada liviana y sus cachés en memoria.
+
+Las rutas que solo necesitan id, email y los datos de perfil usados por el
+modelo reciben un Principal en vez de la fila completa de `users` (que trae
+hashed_password). Se cachean por proceso:
+
+- el payload de cada token ya verificado, hasta su `exp`, para no repetir la
+  verificación de la firma en cada petición;
+- el Principal por (sub, exp) del token, con TTL corto, para no consultar
+  `users` en cada petición.
+
+Cualquier cambio de un usuario a través del ORM invalida su Principal en este
+proceso (ver crud/crud_user.py); en los demás workers la entrada expira con
+el TTL (AUTH_PRINCIPAL_CACHE_TTL_SECONDS).
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from jose import jwt
+
+from core.cache import TTLCache
+from core.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    birth_date: str  # como se guarda en users (YYYY-MM-DD)
+    gender: str
+
+
+PROFILE_CLAIMS = ("uid", "birth_date", "gender")
+
+
+def principal_from_claims(payload: dict) -> Optional[Principal]:
+    """Principal armado solo con los claims del token, o None si no los trae."""
+    if not all(payload.get(claim) is not None for claim in PROFILE_CLAIMS):
+        return None
+    return Principal(
+        id=int(payload["uid"]),
+        email=payload["sub"],
+        birth_date=payload["birth_date"],
+        gender=payload["gender"],
+    )
+
+
+def _new_cache() -> Optional[TTLCache]:
+    if settings.AUTH_PRINCIPAL_CACHE_SIZE <= 0:
+        return None
+    return TTLCache(
+        settings.AUTH_PRINCIPAL_CACHE_SIZE, settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+    )
+
+
+token_cache = _new_cache()
+principal_cache = _new_cache()
+
+
+def _seconds_left(exp: Optional[float]) -> Optional[float]:
+    return None if exp is None else exp - time.time()
+
+
+def decode_token(token: str) -> dict:
+    """Payload del JWT; lanza JWTError si la firma o la expiración no son válidas."""
+    if token_cache is not None:
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if token_cache is not None:
+        # El payload no cambia: se guarda hasta la expiración del propio token
+        token_cache.set(token, payload, ttl=_seconds_left(payload.get("exp")))
+    return payload
+
+
+def get_cached_principal(sub: str, exp: Optional[float]) -> Optional[Principal]:
+    if principal_cache is None:
+        return None
+    return principal_cache.get((sub, exp))
+
+
+def remember_principal(sub: str, exp: Optional[float], principal: Principal) -> None:
+    if principal_cache is None:
+        return
+    left = _seconds_left(exp)
+    ttl = settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+    principal_cache.set((sub, exp), principal, ttl=ttl if left is None else min(left, ttl))
+
+
+def invalidate_principal(email: str) -> int:
+    """Descarta los Principal cacheados de `email`; devuelve cuántos había."""
+    if principal_cache is None:
+        return 0
+    return principal_cache.pop_matching(lambda key: key[0] == email)
+
+
+def cache_stats() -> dict:
+    return {
+        "tokens": token_cache.stats() if token_cache is not None else None,
+        "principals": principal_cache.stats() if principal_cache is not None else None,
+    }
@@ -0,0 +1,234 @@
+# core/rate_limit.py
+"""
+Limitador token bucket para las rutas que pagan el KDF (/auth/token, /users).
+
+Cada clave (IP o cuenta) tiene un balde de `burst` fichas que se recarga a
+`per_minute` fichas por minuto; cada intento consume una de cada balde que le
+aplica (login: IP y cuenta) solo si todos tienen, y si no se rechaza antes de
+consultar la base o calcular pbkdf2, con el tiempo hasta la próxima ficha
+como Retry-After.
+
+El estado vive en memoria por proceso: (fichas, instante) por clave en un
+OrderedDict acotado a RATE_LIMIT_MAX_KEYS (se desaloja la clave usada hace
+más tiempo). Con RATE_LIMIT_REDIS_URL los baldes se comparten entre workers
+con un script Lua atómico sobre redis.asyncio (sin bloquear el event loop);
+si Redis falla, se sigue con el balde local.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger("rate_limit")
+
+# Recarga y consumo atómicos en Redis de todos los baldes de una petición:
+# solo consume si todos tienen ficha. ARGV = now, capacity_1, rate_1, ...;
+# devuelve {permitido, fichas_1, ...}
+_REDIS_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'at')
+    local current = tonumber(bucket[1]) or capacity
+    local at = tonumber(bucket[2]) or now
+    tokens[i] = math.min(capacity, current + math.max(0, now - at) * rate)
+    if tokens[i] < 1 then
+        allowed = 0
+    end
+end
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    if allowed == 1 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens[i], 'at', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    result[i + 1] = tostring(tokens[i])
+end
+return result
+"""
+
+
+class TokenBucketLimiter:
+    def __init__(
+        self,
+        name: str,
+        burst: int,
+        per_minute: float,
+        max_keys: int = 100000,
+    ):
+        if burst <= 0 or per_minute <= 0:
+            raise ValueError("burst y per_minute deben ser mayores que 0")
+        self.name = name
+        self.capacity = float(burst)
+        self.rate = per_minute / 60.0  # fichas por segundo
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+        self.backend_errors = 0
+
+    def _refill(self, key: str, now: float) -> float:
+        """Fichas de `key` a `now` (con self._lock tomado)."""
+        tokens, at = self._buckets.pop(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - at) * self.rate)
+
+    def _store(self, key: str, tokens: float, now: float) -> None:
+        """Guarda el balde (con self._lock tomado) y desaloja los más viejos."""
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+    def retry_after(self, tokens: float) -> float:
+        return (1 - tokens) / self.rate
+
+    def record(self, allowed: bool, tokens: float) -> None:
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            elif tokens < 1:
+                self.rejected += 1
+
+    def record_backend_error(self) -> None:
+        with self._lock:
+            self.backend_errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "burst": int(self.capacity),
+                "per_minute": round(self.rate * 60, 4),
+                "backend": "redis" if _script is not None else "memory",
+                "keys": len(self._buckets),
+                "max_keys": self.max_keys,
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evictions": self.evictions,
+                "backend_errors": self.backend_errors,
+            }
+
+
+def _take_local(
+    checks: List[Tuple[TokenBucketLimiter, str]], now: float
+) -> Tuple[bool, List[float]]:
+    # Locks en orden fijo: dos peticiones con los mismos baldes no se bloquean
+    limiters = {limiter.name: limiter for limiter, _ in checks}
+    with ExitStack() as stack:
+        for name in sorted(limiters):
+            stack.enter_context(limiters[name]._lock)
+        tokens = [limiter._refill(key, now) for limiter, key in checks]
+        allowed = all(t >= 1 for t in tokens)
+        for (limiter, key), t in zip(checks, tokens):
+            limiter._store(key, t - 1 if allowed else t, now)
+    return allowed, tokens
+
+
+async def _take_shared(
+    checks: List[Tuple[TokenBucketLimiter, str]], now: float
+) -> Optional[Tuple[bool, List[float]]]:
+    args = [now]
+    for limiter, _ in checks:
+        args += [limiter.capacity, limiter.rate]
+    try:
+        allowed, *tokens = await _script(
+            keys=[f"rl:{limiter.name}:{key}" for limiter, key in checks], args=args
+        )
+    except Exception:
+        for limiter, _ in checks:
+            limiter.record_backend_error()
+        logger.exception("Rate limit: Redis no disponible, se usa el balde local")
+        return None
+    return bool(int(allowed)), [float(t) for t in tokens]
+
+
+async def consume(checks: List[Tuple[TokenBucketLimiter, str]]) -> Optional[float]:
+    """
+    Consume una ficha de cada (limitador, clave) solo si todos tienen: un
+    rechazo por cuenta no gasta la ficha de la IP. Devuelve None si se
+    permite, o los segundos hasta que todos tengan ficha si se rechaza.
+    """
+    # Reloj de pared: en Redis lo comparten todos los workers
+    now = time.time()
+    result = await _take_shared(checks, now) if _script is not None else None
+    if result is None:
+        result = _take_local(checks, now)
+    allowed, tokens = result
+    for (limiter, _), t in zip(checks, tokens):
+        limiter.record(allowed, t)
+    if allowed:
+        return None
+    return max(
+        limiter.retry_after(t) for (limiter, _), t in zip(checks, tokens) if t < 1
+    )
+
+
+def _redis_script():
+    if not settings.RATE_LIMIT_REDIS_URL:
+        return None
+    import redis.asyncio as redis
+
+    client = redis.Redis.from_url(
+        settings.RATE_LIMIT_REDIS_URL, socket_timeout=0.05, socket_connect_timeout=0.05
+    )
+    return client.register_script(_REDIS_SCRIPT)
+
+
+_script = None
+_limiters: Optional[Dict[str, TokenBucketLimiter]] = None
+_limiters_lock = threading.Lock()
+
+
+def get_limiters() -> Dict[str, TokenBucketLimiter]:
+    """Limitadores por alcance: login por IP y por cuenta, registro por IP."""
+    global _limiters, _script
+    if _limiters is None:
+        with _limiters_lock:
+            if _limiters is None:
+                _script = _redis_script()
+                limits = {
+                    "login_ip": (
+                        settings.RATE_LIMIT_LOGIN_IP_BURST,
+                        settings.RATE_LIMIT_LOGIN_IP_PER_MINUTE,
+                    ),
+                    "login_account": (
+                        settings.RATE_LIMIT_LOGIN_ACCOUNT_BURST,
+                        settings.RATE_LIMIT_LOGIN_ACCOUNT_PER_MINUTE,
+                    ),
+                    "signup_ip": (
+                        settings.RATE_LIMIT_SIGNUP_IP_BURST,
+                        settings.RATE_LIMIT_SIGNUP_IP_PER_MINUTE,
+                    ),
+                }
+                _limiters = {
+                    name: TokenBucketLimiter(
+                        name, burst, per_minute, settings.RATE_LIMIT_MAX_KEYS
+                    )
+                    for name, (burst, per_minute) in limits.items()
+                }
+    return _limiters
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+def rate_limit_stats() -> dict:
+    if not settings.RATE_LIMIT_ENABLED:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        **{name: limiter.stats() for name, limiter in get_limiters().items()},
+    }
@@ -1,6 +1,7 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from core.config import settings
@@ -12,6 +13,8 @@ pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
 MAX_PASSWORD_LEN = 256
 
+ACCESS = "access"
+REFRESH = "refresh"
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -39,15 +42,45 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def generate_tokens(user_email: str):
+def profile_claims(user) -> dict:
+    """
+    Claims de perfil para el token (AUTH_PROFILE_CLAIMS): id y los datos que
+    usa el modelo, para que las rutas de evaluación no consulten `users`.
+    """
+    if not config.settings.AUTH_PROFILE_CLAIMS:
+        return {}
+    return {
+        "uid": user.id,
+        "birth_date": str(user.birth_date),
+        "gender": user.gender,
+    }
+
+
+def generate_tokens(user_email: str, claims: Optional[dict] = None):
+    data = {"sub": user_email, **(claims or {})}
     access_token_expires = timedelta(
         minutes=config.settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
     access_token = security.create_access_token(
-        data={"sub": user_email}, expires_delta=access_token_expires
+        data={**data, "type": ACCESS}, expires_delta=access_token_expires
     )
-    refresh_token_expires = timedelta(days=7)
+    refresh_token_expires = timedelta(days=config.settings.REFRESH_TOKEN_EXPIRE_DAYS)
     refresh_token = security.create_access_token(
-        data={"sub": user_email}, expires_delta=refresh_token_expires
+        data={**data, "type": REFRESH, "jti": uuid.uuid4().hex},
+        expires_delta=refresh_token_expires,
     )
     return access_token, refresh_token
+
+
+def decode_refresh_token(refresh_token: str) -> dict:
+    """
+    Verifica la firma y el tipo de un refresh token y devuelve sus claims.
+    Lanza JWTError si no es válido. Que no se haya canjeado antes y que el
+    usuario siga existiendo lo comprueba /auth/refresh contra la base.
+    """
+    payload = jwt.decode(
+        refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    )
+    if payload.get("type") != REFRESH or not payload.get("jti") or not payload.get("sub"):
+        raise JWTError("No es un refresh token")
+    return payload
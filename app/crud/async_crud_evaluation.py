@@ -0,0 +1,92 @@
+# crud/async_crud_evaluation.py
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud import crud_evaluation
+from crud.crud_evaluation import _build_evaluation
+from db import models
+from db.base import sync_fallback
+from schemas import schemas
+
+
+@sync_fallback(crud_evaluation.create_evaluation)
+async def create_evaluation(
+    db: AsyncSession,
+    user_id: int,
+    evaluation_in: schemas.EvaluationCreate,
+    probability: float,
+    risk_level: str,
+    imc: float,
+    age: int,
+    model_version: Optional[str] = None,
+    feature_contributions: Optional[dict] = None,
+):
+    obj = _build_evaluation(
+        user_id,
+        evaluation_in,
+        probability,
+        risk_level,
+        imc,
+        age,
+        model_version,
+        feature_contributions,
+    )
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+
+@sync_fallback(crud_evaluation.create_evaluations_bulk)
+async def create_evaluations_bulk(db: AsyncSession, user_id: int, entries: list):
+    """
+    Inserta varias evaluaciones en una sola transacción.
+    `entries` es una lista de (evaluation_in, prediction).
+    """
+    objs = [
+        _build_evaluation(
+            user_id,
+            evaluation_in,
+            prediction.probability,
+            prediction.risk_level,
+            prediction.imc,
+            prediction.age,
+            prediction.model_version,
+            prediction.contributions,
+        )
+        for evaluation_in, prediction in entries
+    ]
+    db.add_all(objs)
+    await db.flush()
+    ids = [obj.id for obj in objs]
+    await db.commit()
+    # Un único SELECT para refrescar todo el lote (en vez de N refresh)
+    await db.execute(
+        select(models.Evaluation)
+        .where(models.Evaluation.id.in_(ids))
+        .execution_options(populate_existing=True)
+    )
+    return objs
+
+
+@sync_fallback(crud_evaluation.get_evaluations_by_user)
+async def get_evaluations_by_user(db: AsyncSession, user_id: int):
+    result = await db.execute(
+        select(models.Evaluation)
+        .where(models.Evaluation.user_id == user_id)
+        .order_by(models.Evaluation.created_at.desc())
+    )
+    return result.scalars().all()
+
+
+@sync_fallback(crud_evaluation.get_last_evaluation_by_user)
+async def get_last_evaluation_by_user(db: AsyncSession, user_id: int):
+    result = await db.execute(
+        select(models.Evaluation)
+        .where(models.Evaluation.user_id == user_id)
+        .order_by(models.Evaluation.id.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
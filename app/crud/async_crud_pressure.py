@@ -0,0 +1,64 @@
+# crud/async_crud_pressure.py
+from sqlalchemy import delete, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.bp_logic import classify_bp
+from crud import crud_pressure
+from db.base import sync_fallback
+from db.models import BloodPressure
+from schemas.schemas import BPCreate
+
+
+@sync_fallback(crud_pressure.create_for_user)
+async def create_for_user(db: AsyncSession, user_id: int, data: BPCreate) -> BloodPressure:
+    cat = classify_bp(data.systolic, data.diastolic)
+    obj = BloodPressure(
+        user_id=user_id,
+        systolic=data.systolic,
+        diastolic=data.diastolic,
+        taken_at=data.taken_at,
+        category=cat.value,
+    )
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+
+@sync_fallback(crud_pressure.get_last)
+async def get_last(db: AsyncSession, user_id: int):
+    result = await db.execute(
+        select(BloodPressure)
+        .where(BloodPressure.user_id == user_id)
+        .order_by(desc(BloodPressure.taken_at))
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+@sync_fallback(crud_pressure.get_list)
+async def get_list(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 50):
+    total = await db.scalar(
+        select(func.count())
+        .select_from(BloodPressure)
+        .where(BloodPressure.user_id == user_id)
+    )
+    result = await db.execute(
+        select(BloodPressure)
+        .where(BloodPressure.user_id == user_id)
+        .order_by(BloodPressure.taken_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.scalars().all(), total
+
+
+@sync_fallback(crud_pressure.delete_one)
+async def delete_one(db: AsyncSession, user_id: int, bp_id: int) -> bool:
+    result = await db.execute(
+        delete(BloodPressure).where(
+            BloodPressure.user_id == user_id, BloodPressure.id == bp_id
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
@@ -0,0 +1,27 @@
+# crud/async_crud_rating.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud import crud_rating
+from db.base import sync_fallback
+from db.models import AppRating
+from schemas.schemas import AppRatingCreate
+
+
+@sync_fallback(crud_rating.create_rating)
+async def create_rating(
+    db: AsyncSession, user_id: int, rating_data: AppRatingCreate
+) -> AppRating:
+    db_rating = AppRating(
+        user_id=user_id, rating=rating_data.rating, comment=rating_data.comment
+    )
+    db.add(db_rating)
+    await db.commit()
+    await db.refresh(db_rating)
+    return db_rating
+
+
+@sync_fallback(crud_rating.get_user_rating)
+async def get_user_rating(db: AsyncSession, user_id: int) -> AppRating | None:
+    result = await db.execute(select(AppRating).where(AppRating.user_id == user_id))
+    return result.scalars().first()
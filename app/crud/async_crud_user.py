@@ -0,0 +1,69 @@
+# crud/async_crud_user.py
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.principal import invalidate_principal
+from core.security import get_password_hash
+from crud import crud_user
+from db import models
+from db.base import sync_fallback
+from schemas import schemas
+
+
+@sync_fallback(crud_user.get_user_by_email)
+async def get_user_by_email(db: AsyncSession, email: str):
+    """
+    Busca un usuario por su dirección de correo electrónico.
+    """
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+
+@sync_fallback(crud_user.get_principal_row)
+async def get_principal_row(db: AsyncSession, email: str):
+    U = models.User
+    result = await db.execute(
+        select(U.id, U.email, U.birth_date, U.gender).where(U.email == email)
+    )
+    return result.first()
+
+
+@sync_fallback(crud_user.consume_refresh_jti)
+async def consume_refresh_jti(db: AsyncSession, jti: str, expires_at: datetime) -> bool:
+    T = models.UsedRefreshToken
+    await db.execute(delete(T).where(T.expires_at < datetime.now(timezone.utc)))
+    db.add(T(jti=jti, expires_at=expires_at))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+
+@sync_fallback(crud_user.create_user)
+async def create_user(
+    db: AsyncSession, user: schemas.UserCreate, hashed_password: Optional[str] = None
+):
+    """
+    Crea un nuevo usuario en la base de datos.
+    """
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
+    db_user = models.User(
+        email=user.email,
+        hashed_password=hashed_password,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        birth_date=user.birth_date,
+        gender=user.gender,
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_principal(db_user.email)  # por si quedó uno de una cuenta anterior
+    return db_user
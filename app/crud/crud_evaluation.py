@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from db import models
 from schemas import schemas
 from enum import Enum
+from typing import Optional
 
 
 def _enum_to_value_dict(d: dict):
@@ -15,30 +16,83 @@ def _enum_to_value_dict(d: dict):
     return cleaned
 
 
-def create_evaluation(
-    db: Session,
+def _build_evaluation(
     user_id: int,
     evaluation_in: schemas.EvaluationCreate,
     probability: float,
     risk_level: str,
     imc: float,
     age: int,
-):
+    model_version: Optional[str] = None,
+    feature_contributions: Optional[dict] = None,
+) -> models.Evaluation:
     data = _enum_to_value_dict(evaluation_in.model_dump())
-    obj = models.Evaluation(
+    return models.Evaluation(
         user_id=user_id,
         imc=imc,
         age=age,
         probability=probability,
         risk_level=risk_level,
+        model_version=model_version,
+        feature_contributions=feature_contributions,
         **data
     )
+
+
+def create_evaluation(
+    db: Session,
+    user_id: int,
+    evaluation_in: schemas.EvaluationCreate,
+    probability: float,
+    risk_level: str,
+    imc: float,
+    age: int,
+    model_version: Optional[str] = None,
+    feature_contributions: Optional[dict] = None,
+):
+    obj = _build_evaluation(
+        user_id,
+        evaluation_in,
+        probability,
+        risk_level,
+        imc,
+        age,
+        model_version,
+        feature_contributions,
+    )
     db.add(obj)
     db.commit()
     db.refresh(obj)
     return obj
 
 
+def create_evaluations_bulk(db: Session, user_id: int, entries: list):
+    """
+    Inserta varias evaluaciones en una sola transacción.
+    `entries` es una lista de (evaluation_in, prediction).
+    """
+    objs = [
+        _build_evaluation(
+            user_id,
+            evaluation_in,
+            prediction.probability,
+            prediction.risk_level,
+            prediction.imc,
+            prediction.age,
+            prediction.model_version,
+            prediction.contributions,
+        )
+        for evaluation_in, prediction in entries
+    ]
+    db.add_all(objs)
+    db.flush()
+    ids = [obj.id for obj in objs]
+    db.commit()
+    # Un único SELECT para refrescar todo el lote (en vez de N refresh)
+    db.query(models.Evaluation).filter(models.Evaluation.id.in_(ids)).all()
+    return objs
+
+
 def get_user_evaluations(db: Session, user_id: int, skip: int = 0, limit: int = 100):
     """
     Obtiene una lista de todas las evaluaciones para un usuario específico.
@@ -1,9 +1,46 @@
 # crud/crud_user.py
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
 from db import models
 from schemas import schemas
+from core.principal import invalidate_principal
 from core.security import get_password_hash
 
+
+# Emails cuyo Principal cacheado se descarta al confirmar la transacción
+_PENDING_PRINCIPALS = "invalidate_principals"
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _collect_changed_principal(mapper, connection, target):
+    """
+    Write-through: cualquier cambio de un usuario hecho con el ORM descarta su
+    Principal cacheado (también el del email anterior si cambió). Aquí solo se
+    anota en la sesión: el flush ocurre antes del commit y otra petición aún
+    leería la fila anterior, así que se descarta en after_commit. Los UPDATE
+    masivos (query.update) no disparan este evento.
+    """
+    emails = {target.email, *inspect(target).attrs.email.history.deleted}
+    pending = object_session(target).info.setdefault(_PENDING_PRINCIPALS, set())
+    pending.update(email for email in emails if email)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cached_principals(session):
+    for email in session.info.pop(_PENDING_PRINCIPALS, ()):
+        invalidate_principal(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_principals(session):
+    session.info.pop(_PENDING_PRINCIPALS, None)
+
+
 def get_user_by_email(db: Session, email: str):
     """
     Busca un usuario por su dirección de correo electrónico.
@@ -11,11 +48,21 @@ def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-def create_user(db: Session, user: schemas.UserCreate):
+def get_principal_row(db: Session, email: str):
+    """id, email, birth_date y gender del usuario (sin hashed_password)."""
+    U = models.User
+    return db.query(U.id, U.email, U.birth_date, U.gender).filter(U.email == email).first()
+
+
+def create_user(
+    db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None
+):
     """
-    Crea un nuevo usuario en la base de datos.
+    Crea un nuevo usuario en la base de datos. Si ya se calculó el hash de la
+    contraseña (ejecutor KDF), se recibe en `hashed_password`.
     """
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(
         email=user.email,
         hashed_password=hashed_password,
@@ -27,4 +74,23 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(db_user.email)  # por si quedó uno de una cuenta anterior
     return db_user
+
+
+def consume_refresh_jti(db: Session, jti: str, expires_at: datetime) -> bool:
+    """
+    Marca el jti de un refresh token como canjeado. Devuelve False si ya lo
+    estaba (reuso). De paso borra los que ya expiraron.
+    """
+    T = models.UsedRefreshToken
+    db.query(T).filter(T.expires_at < datetime.now(timezone.utc)).delete(
+        synchronize_session=False
+    )
+    db.add(T(jti=jti, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
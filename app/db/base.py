@@ -1,19 +1,61 @@
 # db/base.py
 
-from google.cloud.sql.connector import Connector
+import asyncio
+import functools
+import threading
+from typing import Optional, Union
+
 import sqlalchemy
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 from core.config import settings
+from db.pool import instrument_engine, pool_options
+from db.replicas import ReplicaSet, replica_targets, wrote_recently
 
 # Primero define Base
 Base = declarative_base()
 
-# Cloud SQL Connector
-connector = Connector(enable_iam_auth=False)
+# Backends (DB_BACKEND):
+# - "cloudsql": Cloud SQL Connector (pg8000 / asyncpg con DB_ASYNC)
+# - "postgres": Postgres directo por DATABASE_URL o DB_HOST/DB_PORT/DB_*
+# - "sqlite":   archivo local (DATABASE_URL), para desarrollo y benchmarks
+BACKENDS = ("cloudsql", "postgres", "sqlite")
+SQLITE_DEFAULT_URL = "sqlite:///./atension.db"
+
+# Los engines y el conector se crean en el primer uso, no al importar
+_engine: Optional[sqlalchemy.engine.Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+connector = None
+
 
-def getconn():
+def _require_cloud_sql_settings():
+    missing = [
+        name
+        for name in ("CLOUD_SQL_CONNECTION_NAME", "DB_USER", "DB_PASSWORD", "DB_NAME")
+        if not getattr(settings, name)
+    ]
+    if missing:
+        raise RuntimeError(
+            f"DB_BACKEND=cloudsql requiere: {', '.join(missing)}"
+        )
+
+
+def getconn(instance: Optional[str] = None):
+    global connector
+    if connector is None:
+        from google.cloud.sql.connector import Connector
+
+        connector = Connector(enable_iam_auth=False)
     conn = connector.connect(
-        settings.CLOUD_SQL_CONNECTION_NAME,
+        instance or settings.CLOUD_SQL_CONNECTION_NAME,
         "pg8000",
         user=settings.DB_USER,
         password=settings.DB_PASSWORD,
@@ -21,30 +63,257 @@ def getconn():
     )
     return conn
 
-engine = sqlalchemy.create_engine(
-    "postgresql+pg8000://",
-    creator=getconn,
-    pool_recycle=1800,
-    pool_pre_ping=True,
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def database_url() -> URL:
+    """URL síncrona del backend configurado (sin usar para "cloudsql")."""
+    if settings.DB_BACKEND == "sqlite":
+        return make_url(settings.DATABASE_URL or SQLITE_DEFAULT_URL)
+    if settings.DATABASE_URL:
+        return make_url(settings.DATABASE_URL)
+    return URL.create(
+        "postgresql+pg8000",
+        username=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        database=settings.DB_NAME,
+    )
+
+
+def _async_url(url: URL) -> URL:
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url.set(drivername="postgresql+asyncpg")
+
+
+def _engine_options(url: Optional[URL], is_async: bool = False) -> dict:
+    options = pool_options(is_async)
+    if url is not None and url.get_backend_name() == "sqlite" and not is_async:
+        # La sesión cambia de hilo entre llamadas (threadpool)
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def _create_engine():
+    if settings.DB_BACKEND not in BACKENDS:
+        raise ValueError(f"DB_BACKEND desconocido: {settings.DB_BACKEND}")
+    if settings.DB_BACKEND == "cloudsql":
+        _require_cloud_sql_settings()
+        return sqlalchemy.create_engine(
+            "postgresql+pg8000://", creator=getconn, **_engine_options(None)
+        )
+    url = database_url()
+    return sqlalchemy.create_engine(url, **_engine_options(url))
+
+
+def get_engine() -> sqlalchemy.engine.Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = instrument_engine(_create_engine(), "primary")
+    return _engine
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
         db.close()
 
 
+# ---------------- Capa asíncrona (DB_ASYNC) ----------------
+# asyncpg (o aiosqlite): las rutas esperan a la base en el event loop en lugar
+# de ocupar un hilo del threadpool por petición.
+_async_connector = None
+_async_connector_lock = asyncio.Lock()
+
+
+async def getconn_async(instance: Optional[str] = None):
+    global _async_connector
+    async with _async_connector_lock:
+        if _async_connector is None:
+            # Debe crearse dentro del event loop que lo va a usar
+            from google.cloud.sql.connector import create_async_connector
+
+            _async_connector = await create_async_connector(enable_iam_auth=False)
+    return await _async_connector.connect_async(
+        instance or settings.CLOUD_SQL_CONNECTION_NAME,
+        "asyncpg",
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        db=settings.DB_NAME,
+    )
+
+
+def _create_async_engine() -> AsyncEngine:
+    if settings.DB_BACKEND == "cloudsql":
+        _require_cloud_sql_settings()
+        return create_async_engine(
+            "postgresql+asyncpg://",
+            async_creator=getconn_async,
+            **_engine_options(None, is_async=True),
+        )
+    url = database_url()
+    return create_async_engine(_async_url(url), **_engine_options(url, is_async=True))
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = instrument_engine(_create_async_engine(), "primary_async")
+    return _async_engine
+
+
+# expire_on_commit=False: tras el commit los objetos se serializan sin volver a la base
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+# Lo que entrega get_session según DB_ASYNC
+AnySession = Union[AsyncSession, Session]
+
+
+async def get_async_db():
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+
+async def get_session():
+    """
+    Sesión para las rutas async: AsyncSession con DB_ASYNC, o la Session
+    síncrona de siempre (sus consultas van al threadpool, ver sync_fallback).
+    """
+    if settings.DB_ASYNC:
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            yield db
+        return
+    db = SessionLocal(bind=get_engine())
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+# ---------------- Réplicas de lectura (DB_READ_REPLICAS) ----------------
+_replicas: Optional[ReplicaSet] = None
+
+
+def _create_replica_engine(index: int, target: str):
+    """Engine (sync o async según DB_ASYNC) para una URL o un connection name de Cloud SQL."""
+    if "://" in target:
+        url = make_url(target)
+        if settings.DB_ASYNC:
+            engine = create_async_engine(
+                _async_url(url), **_engine_options(url, is_async=True)
+            )
+        else:
+            engine = sqlalchemy.create_engine(url, **_engine_options(url))
+    elif settings.DB_ASYNC:
+        engine = create_async_engine(
+            "postgresql+asyncpg://",
+            async_creator=functools.partial(getconn_async, target),
+            **_engine_options(None, is_async=True),
+        )
+    else:
+        engine = sqlalchemy.create_engine(
+            "postgresql+pg8000://",
+            creator=functools.partial(getconn, target),
+            **_engine_options(None),
+        )
+    return instrument_engine(engine, f"replica-{index}")
+
+
+def get_replica_set() -> ReplicaSet:
+    global _replicas
+    if _replicas is None:
+        with _engine_lock:
+            if _replicas is None:
+                _replicas = ReplicaSet(_create_replica_engine, replica_targets())
+    return _replicas
+
+
+def _close_sync(db: Session, conn) -> None:
+    db.close()
+    conn.close()
+
+
+async def get_read_session(user_id: Optional[int] = None):
+    """
+    Sesión de solo lectura: una réplica en round-robin o, si no hay ninguna
+    disponible o `user_id` escribió hace menos de DB_READ_YOUR_WRITES_SECONDS,
+    la sesión del primario (get_session).
+    """
+    replicas = get_replica_set()
+    read_your_writes = user_id is not None and wrote_recently(user_id)
+    if not read_your_writes:
+        for index in replicas.candidates():
+            try:
+                engine = replicas.engine(index)
+                if settings.DB_ASYNC:
+                    conn = await engine.connect()
+                else:
+                    conn = await run_in_threadpool(engine.connect)
+            except Exception as exc:
+                replicas.record_failure(index, exc)
+                continue
+            replicas.record_read(index)
+            if settings.DB_ASYNC:
+                async with AsyncSessionLocal(bind=conn) as db:
+                    try:
+                        yield db
+                    finally:
+                        await conn.close()
+                return
+            db = SessionLocal(bind=conn)
+            try:
+                yield db
+            finally:
+                await run_in_threadpool(_close_sync, db, conn)
+            return
+    replicas.record_primary(read_your_writes)
+    async for db in get_session():
+        yield db
+
+
+def sync_fallback(sync_fn):
+    """
+    Para las funciones de crud/async_crud_*: si reciben una Session síncrona
+    (DB_ASYNC deshabilitado) ejecutan su equivalente de crud/crud_* en el
+    threadpool, así las rutas tienen un único camino de código.
+    """
+
+    def decorator(async_fn):
+        @functools.wraps(async_fn)
+        async def wrapper(db, *args, **kwargs):
+            if isinstance(db, Session):
+                return await run_in_threadpool(sync_fn, db, *args, **kwargs)
+            return await async_fn(db, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 # IMPORTA MODELOS AL FINAL
 from db import models  # noqa
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
-
 def close_connector():
-    connector.close()
-    print("Cloud SQL Connector cerrado.")
\ No newline at end of file
+    if connector is not None:
+        connector.close()
+        print("Cloud SQL Connector cerrado.")
+
+
+async def close_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _replicas is not None and settings.DB_ASYNC:
+        for engine in _replicas.dispose_all():
+            await engine.dispose()
+    if _async_connector is not None:
+        await _async_connector.close_async()
\ No newline at end of file
@@ -0,0 +1,195 @@
+# db/migrate.py
+"""
+Aplica las migraciones de db/migrations y lleva la versión del esquema en la
+tabla `schema_version`. El DDL ya no corre al arrancar la app: se ejecuta
+antes de servir (el CMD del Dockerfile corre `upgrade` y luego uvicorn) o a
+mano, una vez por despliegue (desde app/):
+
+    python -m db.migrate status
+    python -m db.migrate upgrade [--to N]
+    python -m db.migrate check        # código 1 si faltan migraciones
+
+Al arrancar, según DB_MIGRATIONS_ON_STARTUP:
+- "check" (por defecto): una consulta a schema_version; si la base está
+  atrasada frente al código el arranque falla; si está adelantada (otra
+  instancia ya desplegó una versión nueva) solo se avisa.
+- "upgrade": aplica las pendientes (desarrollo local, sqlite).
+- "off": no revisa nada.
+
+En Postgres cada migración toma un advisory lock, así que dos procesos que
+corran `upgrade` a la vez no aplican la misma versión dos veces. Una base
+creada antes de este sistema (sin `schema_version`) se pone al día con el
+mismo `upgrade`: la baseline no recrea las tablas existentes y las columnas
+nuevas se agregan solo si faltan.
+"""
+import argparse
+import importlib
+import logging
+import pkgutil
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    inspect,
+    select,
+    text,
+)
+
+from core.config import settings
+from db import migrations
+from db.base import get_engine
+
+logger = logging.getLogger("db_migrate")
+
+STARTUP_MODES = ("check", "upgrade", "off")
+_MODULE_PATTERN = re.compile(r"^m(\d{4})_\w+$")
+_LOCK_KEY = 72016  # advisory lock de Postgres para las migraciones
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    description: str
+    upgrade: Callable
+
+
+def discover() -> List[Migration]:
+    """Migraciones de db/migrations ordenadas por versión."""
+    found = []
+    for info in pkgutil.iter_modules(migrations.__path__):
+        match = _MODULE_PATTERN.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{migrations.__name__}.{info.name}")
+        description = (module.__doc__ or info.name).strip().splitlines()[0]
+        found.append(Migration(int(match.group(1)), info.name, description, module.upgrade))
+    found.sort(key=lambda m: m.version)
+    versions = [m.version for m in found]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Versiones de migración duplicadas: {versions}")
+    return found
+
+
+def latest_version() -> int:
+    available = discover()
+    return available[-1].version if available else 0
+
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def _lock(conn) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+
+
+def upgrade(engine=None, target: Optional[int] = None) -> List[int]:
+    """Aplica las migraciones pendientes hasta `target` (o la última); devuelve las aplicadas."""
+    engine = engine or get_engine()
+    applied = []
+    for migration in discover():
+        if target is not None and migration.version > target:
+            break
+        # Una transacción por versión: si una falla, las anteriores quedan aplicadas
+        with engine.begin() as conn:
+            _lock(conn)
+            schema_version.create(conn, checkfirst=True)
+            if current_version(conn) >= migration.version:
+                continue
+            logger.info(
+                "Aplicando migración %04d: %s", migration.version, migration.description
+            )
+            migration.upgrade(conn)
+            conn.execute(
+                schema_version.insert().values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.now(timezone.utc),
+                )
+            )
+        applied.append(migration.version)
+    return applied
+
+
+def status(engine=None) -> dict:
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        current = current_version(conn)
+    available = discover()
+    return {
+        "current": current,
+        "latest": available[-1].version if available else 0,
+        "pending": [
+            f"{m.version:04d} {m.description}" for m in available if m.version > current
+        ],
+    }
+
+
+def check_on_startup() -> None:
+    mode = settings.DB_MIGRATIONS_ON_STARTUP
+    if mode not in STARTUP_MODES:
+        raise ValueError(f"DB_MIGRATIONS_ON_STARTUP desconocido: {mode}")
+    if mode == "off":
+        return
+    if mode == "upgrade":
+        applied = upgrade()
+        if applied:
+            logger.info("Migraciones aplicadas al arrancar: %s", applied)
+        return
+    info = status()
+    if info["current"] < info["latest"]:
+        raise RuntimeError(
+            f"Esquema en la versión {info['current']}, el código requiere la "
+            f"{info['latest']}: ejecuta `python -m db.migrate upgrade`"
+        )
+    if info["current"] > info["latest"]:
+        logger.warning(
+            "Esquema en la versión %s, más nueva que la de este código (%s)",
+            info["current"],
+            info["latest"],
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones del esquema.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Versión actual y migraciones pendientes")
+    up = sub.add_parser("upgrade", help="Aplica las migraciones pendientes")
+    up.add_argument("--to", type=int, default=None, help="Versión destino")
+    sub.add_parser("check", help="Código de salida 1 si faltan migraciones")
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        applied = upgrade(target=args.to)
+        print(f"Migraciones aplicadas: {applied or 'ninguna'}")
+        args.command = "status"
+    info = status()
+    print(f"Versión actual: {info['current']} | última: {info['latest']}")
+    for pending in info["pending"]:
+        print(f"  pendiente: {pending}")
+    if args.command == "check" and info["pending"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# db/migrations/__init__.py
+"""
+Migraciones versionadas del esquema (ver db/migrate.py).
+
+Cada módulo `mNNNN_<nombre>.py` es una versión: NNNN es el número, el
+docstring la describe y `upgrade(conn)` aplica el cambio dentro de la
+transacción que abre db/migrate.py. Las versiones se aplican en orden y se
+registran en la tabla `schema_version`.
+
+La baseline (m0001) es el esquema congelado previo a las migraciones; cada
+migración declara su propio DDL y no importa db/models.py, para que una
+versión signifique lo mismo aunque los modelos cambien después. Las bases
+creadas antes de este sistema (con create_all al arrancar) pueden tener ya
+parte de los cambios, por eso las columnas se agregan con
+add_column_if_missing.
+"""
+from sqlalchemy import inspect, text
+
+
+def column_exists(conn, table: str, column: str) -> bool:
+    return any(col["name"] == column for col in inspect(conn).get_columns(table))
+
+
+def add_column_if_missing(conn, table: str, column: str, ddl_type: str) -> bool:
+    if column_exists(conn, table, column):
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+    return True
@@ -0,0 +1,101 @@
+"""Tablas base: users, evaluations, blood_pressures y app_ratings."""
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+)
+
+# Esquema congelado tal como estaba antes de las migraciones: no depende de
+# db/models.py, así que la versión 1 es la misma en cualquier despliegue.
+# Los cambios posteriores van en migraciones nuevas.
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("first_name", String),
+    Column("last_name", String),
+    Column("birth_date", String),
+    Column("gender", String),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "evaluations",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column(
+        "user_id",
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    ),
+    Column("weight_kg", Float, nullable=False),
+    Column("height_cm", Float, nullable=False),
+    Column("imc", Float, nullable=False),
+    Column("age", Integer, nullable=False),
+    Column("probability", Float, nullable=False),
+    Column("risk_level", String, nullable=False),
+    Column("reduces_salt_intake", Boolean),
+    Column("alcohol_in_last_30_days", Boolean),
+    Column("smoking_habit", String),
+    Column("e_cigarette_use", String),
+    Column("stress_days_last_month", Integer),
+    Column("daily_physical_activity", Boolean),
+    Column("has_high_cholesterol", Boolean),
+    Column("diabetes_diagnosis", String),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "blood_pressures",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column(
+        "user_id",
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    ),
+    Column("systolic", Integer, nullable=False),
+    Column("diastolic", Integer, nullable=False),
+    Column("taken_at", DateTime(timezone=True), nullable=False),
+    Column(
+        "category",
+        Enum(
+            "NORMAL", "ELEVADO", "PREHIPERTENSION", "HIPERTENSION", name="bp_category"
+        ),
+        nullable=False,
+    ),
+    Column(
+        "created_at", DateTime(timezone=True), server_default=func.now(), nullable=False
+    ),
+)
+
+Table(
+    "app_ratings",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("rating", Integer, nullable=False),
+    Column("comment", String, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def upgrade(conn):
+    # checkfirst: en una base creada antes de las migraciones las tablas ya existen
+    metadata.create_all(bind=conn, checkfirst=True)
@@ -0,0 +1,37 @@
+"""Enum bp_category con NORMAL, ELEVADO, PREHIPERTENSION e HIPERTENSION."""
+from sqlalchemy import text
+
+REQUIRED_VALUES = ["NORMAL", "ELEVADO", "PREHIPERTENSION", "HIPERTENSION"]
+
+
+def upgrade(conn):
+    if conn.dialect.name != "postgresql":
+        return  # el enum nativo solo existe en Postgres (sqlite guarda VARCHAR)
+    existing = [
+        row[0]
+        for row in conn.execute(
+            text(
+                """
+            SELECT enumlabel
+            FROM pg_enum
+            JOIN pg_type ON pg_enum.enumtypid = pg_type.oid
+            WHERE pg_type.typname = 'bp_category'
+        """
+            )
+        )
+    ]
+    if set(existing) == set(REQUIRED_VALUES):
+        return
+    labels = ", ".join(f"'{value}'" for value in REQUIRED_VALUES)
+    # Se recrea el tipo pasando la columna por VARCHAR
+    conn.execute(
+        text("ALTER TABLE blood_pressures ALTER COLUMN category TYPE VARCHAR(50)")
+    )
+    conn.execute(text("DROP TYPE IF EXISTS bp_category CASCADE"))
+    conn.execute(text(f"CREATE TYPE bp_category AS ENUM ({labels})"))
+    conn.execute(
+        text(
+            "ALTER TABLE blood_pressures "
+            "ALTER COLUMN category TYPE bp_category USING category::bp_category"
+        )
+    )
@@ -0,0 +1,6 @@
+"""evaluations.model_version: versión del modelo que generó el resultado."""
+from db.migrations import add_column_if_missing
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "evaluations", "model_version", "VARCHAR")
@@ -0,0 +1,6 @@
+"""evaluations.feature_contributions: aporte de cada feature a la probabilidad."""
+from db.migrations import add_column_if_missing
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "evaluations", "feature_contributions", "JSON")
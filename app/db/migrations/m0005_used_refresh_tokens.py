@@ -0,0 +1,13 @@
+"""used_refresh_tokens: jti de refresh tokens canjeados (rotación entre workers)."""
+from sqlalchemy import Column, DateTime, MetaData, String, Table
+
+used_refresh_tokens = Table(
+    "used_refresh_tokens",
+    MetaData(),
+    Column("jti", String, primary_key=True),
+    Column("expires_at", DateTime(timezone=True), nullable=False, index=True),
+)
+
+
+def upgrade(conn):
+    used_refresh_tokens.create(conn, checkfirst=True)
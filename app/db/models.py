@@ -7,6 +7,7 @@ from sqlalchemy import (
     Float,
     ForeignKey,
     DateTime,
+    JSON,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -52,6 +53,9 @@ class Evaluation(Base):
     daily_physical_activity = Column(Boolean)
     has_high_cholesterol = Column(Boolean)
     diabetes_diagnosis = Column(String)
+    model_version = Column(String, nullable=True)
+    # {"BMI": 0.12, "Smoker": -0.01, ...}: aporte de cada feature a probability
+    feature_contributions = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="evaluations")
@@ -84,3 +88,11 @@ class AppRating(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="app_ratings")
+
+
+class UsedRefreshToken(Base):
+    # jti de refresh tokens ya canjeados, compartidos por todos los workers
+    __tablename__ = "used_refresh_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,185 @@
+# db/pool.py
+"""
+Pool de conexiones instrumentado.
+
+InstrumentedQueuePool (y su variante async) miden cuánto tarda cada checkout
+(espera en la cola + conexión nueva + ping) y cuentan los que agotan
+DB_POOL_TIMEOUT; los eventos del pool llevan conexiones abiertas, en uso,
+desborde e invalidaciones. /admin/db/pool expone estas métricas por engine
+para dimensionar DB_POOL_SIZE/DB_MAX_OVERFLOW frente al threadpool de uvicorn.
+
+Estrategias de ping al hacer checkout (DB_POOL_PRE_PING):
+- "always": pool_pre_ping de SQLAlchemy, un round trip por checkout.
+- "idle":   solo si la conexión estuvo inactiva más de DB_POOL_PING_IDLE_SECONDS.
+- "never":  sin ping; una conexión caída se detecta al usarla y se invalida.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from core.config import settings
+from core.metrics import Histogram
+
+logger = logging.getLogger("db_pool")
+
+PING_STRATEGIES = ("always", "idle", "never")
+CHECKOUT_BUCKETS_MS = [0.1, 0.5, 1, 5, 10, 25, 50, 100, 250, 1000, 5000]
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_ms = Histogram(CHECKOUT_BUCKETS_MS)
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.idle_pings = 0
+        self.max_in_use = 0
+
+    def observe_checkout(self, elapsed_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkout_ms.observe(elapsed_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+            if name == "checkouts":
+                self.max_in_use = max(self.max_in_use, self.checkouts - self.checkins)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "idle_pings": self.idle_pings,
+                "max_in_use": self.max_in_use,
+                "checkout_ms": self.checkout_ms.snapshot(),
+            }
+
+
+class _InstrumentedMixin:
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_checkout(
+                    (time.perf_counter() - start) * 1000, timed_out
+                )
+
+    def recreate(self):
+        # engine.dispose() crea un pool nuevo: conserva las métricas
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(is_async: bool = False) -> dict:
+    """Argumentos de create_engine/create_async_engine según la configuración."""
+    if settings.DB_POOL_PRE_PING not in PING_STRATEGIES:
+        raise ValueError(f"DB_POOL_PRE_PING desconocido: {settings.DB_POOL_PRE_PING}")
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+    }
+
+
+_pools: Dict[str, tuple] = {}
+
+
+def instrument_engine(engine, name: str):
+    """Registra las métricas y los eventos del pool de `engine` (sync o async)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool = sync_engine.pool
+    metrics = PoolMetrics()
+    pool.metrics = metrics
+    idle_limit = settings.DB_POOL_PING_IDLE_SECONDS
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, record):
+        metrics.count("connects")
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, record, proxy):
+        last_used = record.info.get("checked_in_at")
+        if (
+            settings.DB_POOL_PRE_PING == "idle"
+            and last_used is not None
+            and time.monotonic() - last_used > idle_limit
+        ):
+            metrics.count("idle_pings")
+            try:
+                alive = sync_engine.dialect.do_ping(dbapi_connection)
+            except Exception:
+                alive = False
+            if not alive:
+                # El pool descarta la conexión y reintenta con una nueva
+                raise exc.DisconnectionError("Conexión inactiva caída")
+        metrics.count("checkouts")
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, record):
+        metrics.count("checkins")
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, record, exception):
+        metrics.count("invalidations")
+        logger.warning("Conexión invalidada (%s): %s", name, exception)
+
+    @event.listens_for(pool, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, record, exception):
+        metrics.count("soft_invalidations")
+
+    _pools[name] = (sync_engine, metrics)
+    return engine
+
+
+def pool_stats() -> dict:
+    """Estado y métricas de cada engine creado en este proceso."""
+    stats = {}
+    for name, (engine, metrics) in _pools.items():
+        pool = engine.pool
+        stats[name] = {
+            "pool_size": pool.size(),
+            "max_overflow": getattr(pool, "_max_overflow", None),
+            "timeout_seconds": getattr(pool, "_timeout", None),
+            "pre_ping": settings.DB_POOL_PRE_PING,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            **metrics.snapshot(),
+        }
+    return stats
@@ -0,0 +1,123 @@
+# db/replicas.py
+"""
+Ruteo de lecturas a réplicas.
+
+Las rutas GET de historial (/pressures, /evaluations) leen de las réplicas de
+DB_READ_REPLICAS en round-robin. Una réplica que no entrega conexión queda
+fuera DB_REPLICA_RETRY_SECONDS y la lectura pasa a la siguiente o, sin
+ninguna disponible, al primario.
+
+Read-your-writes: cada escritura de un usuario (get_write_db) abre una
+ventana de DB_READ_YOUR_WRITES_SECONDS durante la cual sus lecturas van al
+primario, para que el GET justo después de un POST vea la fila nueva aunque
+la réplica vaya atrasada. La ventana es por proceso: con varios workers, una
+lectura atendida por otro worker puede ir a la réplica; la ventana debe
+cubrir el retraso de replicación habitual.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+from core.cache import TTLCache
+from core.config import settings
+
+logger = logging.getLogger("db_replicas")
+
+
+def replica_targets() -> List[str]:
+    """URLs o connection names de Cloud SQL de DB_READ_REPLICAS (separados por coma)."""
+    raw = settings.DB_READ_REPLICAS or ""
+    return [target.strip() for target in raw.split(",") if target.strip()]
+
+
+class ReplicaSet:
+    def __init__(self, factory: Callable[[int, str], object], targets: List[str]):
+        self.targets = targets
+        self._factory = factory
+        self._engines: List[Optional[object]] = [None] * len(targets)
+        self._down_until = [0.0] * len(targets)
+        self._cursor = itertools.count()
+        self._lock = threading.Lock()
+        self.reads = [0] * len(targets)
+        self.failures = [0] * len(targets)
+        self.primary_reads = 0
+        self.read_your_writes = 0
+
+    def engine(self, index: int):
+        with self._lock:
+            if self._engines[index] is None:
+                self._engines[index] = self._factory(index, self.targets[index])
+            return self._engines[index]
+
+    def candidates(self) -> List[int]:
+        """Réplicas disponibles, empezando por la siguiente en el round-robin."""
+        if not self.targets:
+            return []
+        count = len(self.targets)
+        start = next(self._cursor) % count
+        now = time.monotonic()
+        indexes = [(start + i) % count for i in range(count)]
+        return [i for i in indexes if self._down_until[i] <= now]
+
+    def record_read(self, index: int) -> None:
+        with self._lock:
+            self.reads[index] += 1
+
+    def record_failure(self, index: int, exc: Exception) -> None:
+        with self._lock:
+            self.failures[index] += 1
+            self._down_until[index] = time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+        logger.warning(
+            "Réplica %d no disponible, fuera por %.0f s: %s",
+            index,
+            settings.DB_REPLICA_RETRY_SECONDS,
+            exc,
+        )
+
+    def record_primary(self, read_your_writes: bool) -> None:
+        with self._lock:
+            self.primary_reads += 1
+            if read_your_writes:
+                self.read_your_writes += 1
+
+    def dispose_all(self) -> list:
+        with self._lock:
+            engines = [engine for engine in self._engines if engine is not None]
+            self._engines = [None] * len(self.targets)
+        return engines
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "replicas": [
+                    {
+                        "index": i,
+                        "reads": self.reads[i],
+                        "failures": self.failures[i],
+                        "available": self._down_until[i] <= now,
+                    }
+                    for i in range(len(self.targets))
+                ],
+                "primary_reads": self.primary_reads,
+                "read_your_writes": self.read_your_writes,
+                "read_your_writes_seconds": settings.DB_READ_YOUR_WRITES_SECONDS,
+                "recent_writers": len(recent_writes),
+            }
+
+
+# user_id -> True mientras dure su ventana de read-your-writes
+recent_writes = TTLCache(
+    settings.DB_READ_YOUR_WRITES_MAX_USERS, settings.DB_READ_YOUR_WRITES_SECONDS
+)
+
+
+def mark_write(user_id: int) -> None:
+    if settings.DB_READ_YOUR_WRITES_SECONDS > 0:
+        recent_writes.set(user_id, True)
+
+
+def wrote_recently(user_id: int) -> bool:
+    return recent_writes.get(user_id) is not None
@@ -3,10 +3,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware  # ✅ Importa el middleware
 
-from db import base as db_base
-from api.endpoints import users, auth, evaluations, pressures, ratings
-from db.update_enum import update_bp_category_enum
+from db.base import close_async_engine
+from db.migrate import check_on_startup
+from api.endpoints import users, auth, evaluations, pressures, ratings, admin
 from core.log_config import setup_logging
+from core.config import settings
+from core.kdf import shutdown_kdf_executor
+from ml.predictor import get_predictor, shutdown_predictor
+from ml.executor import get_inference_executor, shutdown_inference_executor
 
 app = FastAPI(
     title="aTensión Backend API",
@@ -28,9 +32,12 @@ app.add_middleware(
 
 @app.on_event("startup")
 def on_startup():
-    db_base.init_db()
-    update_bp_category_enum()
     setup_logging()
+    # Sin DDL al arrancar: solo se verifica la versión del esquema (db/migrate.py)
+    check_on_startup()
+    if settings.ML_EAGER_LOAD:
+        get_predictor()
+    get_inference_executor().warm_up()
 
 
 api_prefix = "/api/v1"
@@ -40,6 +47,7 @@ app.include_router(auth.router, prefix=api_prefix)
 app.include_router(evaluations.router, prefix=api_prefix)
 app.include_router(pressures.router, prefix=api_prefix)
 app.include_router(ratings.router, prefix=api_prefix, tags=["ratings"])
+app.include_router(admin.router, prefix=api_prefix)
 
 
 @app.get("/", tags=["Root"])
@@ -54,4 +62,12 @@ def health_check():
 
 @app.on_event("shutdown")
 def shutdown_event():
+    shutdown_inference_executor()
+    shutdown_kdf_executor()
+    shutdown_predictor()
     print("Apagando la aplicación...")
+
+
+@app.on_event("shutdown")
+async def close_async_db():
+    await close_async_engine()
@@ -0,0 +1,186 @@
+# ml/batching.py
+"""
+Planificador de micro-lotes para inferencia.
+
+Las peticiones concurrentes encolan su vector ya codificado, junto con el
+modelo con el que deben evaluarse, y esperan un Future. Un hilo dedicado
+junta lo que llega dentro de una ventana corta (o hasta `max_batch_size`
+filas), lo evalúa con una sola llamada por modelo y reparte los resultados.
+Así N peticiones simultáneas no compiten por el GIL dentro de sklearn con N
+llamadas separadas, y un cambio de modelo a mitad de ventana no evalúa una
+fila con un modelo distinto del de su clave de caché.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Callable, List
+
+import numpy as np
+
+from core.metrics import Histogram
+
+logger = logging.getLogger("inference_batcher")
+
+# Límites superiores (inclusive) de los histogramas expuestos
+_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+_WAIT_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100]
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        score_fn: Callable[[np.ndarray, Any], np.ndarray],
+        window_ms: float = 3.0,
+        max_batch_size: int = 64,
+        timeout: float = 5.0,
+    ):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.batch_sizes = Histogram(_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(_WAIT_BUCKETS_MS)
+        self.batches = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    # -------------------- Ciclo de vida --------------------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="inference-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            # Bajo el lock de submit: después de esto no entra nada más a la cola
+            self._stopping.set()
+        self._queue.put(None)  # despierta al hilo
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # -------------------- API --------------------
+    def submit(self, row: list, bundle) -> Future:
+        """Encola un vector codificado; el Future resuelve a su probabilidad con `bundle`."""
+        future: Future = Future()
+        with self._lock:
+            if not self._stopping.is_set():
+                self._queue.put((row, bundle, future, time.perf_counter()))
+                return future
+        # Detenido: se evalúa en línea para no dejar al llamador esperando
+        future.set_result(self._score_one(row, bundle))
+        return future
+
+    def score(self, rows: List[list], bundle) -> List[float]:
+        """
+        Atajo bloqueante para hilos del threadpool (rutas síncronas). Si el
+        hilo de despacho no responde en `timeout`, evalúa en línea.
+        """
+        futures = [self.submit(row, bundle) for row in rows]
+        deadline = time.perf_counter() + self.timeout
+        try:
+            return [
+                f.result(max(0.0, deadline - time.perf_counter())) for f in futures
+            ]
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            logger.warning(
+                "Micro-lote sin respuesta en %.1f s; se evalúa en línea", self.timeout
+            )
+            return [float(p) for p in self.score_fn(np.array(rows, dtype=float), bundle)]
+
+    def _score_one(self, row: list, bundle) -> float:
+        return float(self.score_fn(np.array([row], dtype=float), bundle)[0])
+
+    # -------------------- Hilo de despacho --------------------
+    def _collect(self, first) -> list:
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _dispatch(self, batch: list) -> None:
+        dispatched = time.perf_counter()
+        # Una llamada por modelo: las filas encoladas antes y después de un
+        # cambio de versión se evalúan cada una con el suyo
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[1]), []).append(item)
+        for items in groups.values():
+            rows = [row for row, _, _, _ in items]
+            try:
+                probas = self.score_fn(np.array(rows, dtype=float), items[0][1])
+            except Exception as exc:  # el error se propaga a cada llamador
+                logger.exception("Fallo evaluando un lote de %s filas", len(rows))
+                with self._lock:
+                    self.errors += 1
+                for _, _, future, _ in items:
+                    future.set_exception(exc)
+                continue
+            with self._lock:
+                self.batches += 1
+                self.batch_sizes.observe(len(items))
+                for _, _, _, enqueued in items:
+                    self.queue_wait_ms.observe((dispatched - enqueued) * 1000)
+            for (_, _, future, _), p in zip(items, probas):
+                future.set_result(float(p))
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            first = self._queue.get()
+            if first is None:
+                continue
+            self._dispatch(self._collect(first))
+
+        # Al detenerse, se atiende lo que quedó en cola para no dejar esperas
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                continue
+            row, bundle, future, _ = item
+            try:
+                future.set_result(self._score_one(row, bundle))
+            except Exception as exc:
+                future.set_exception(exc)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "queue_depth": self._queue.qsize(),
+                "batches": self.batches,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "batch_size": self.batch_sizes.snapshot(),
+                "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            }
@@ -0,0 +1,60 @@
+# ml/coldstart.py
+"""
+Reporte de arranque en frío del predictor: tiempo de import, tiempo de carga
+del modelo y RSS antes/después. Pensado para ejecutarse en cada release
+(desde app/) y comparar la serie:
+
+    python -m ml.coldstart --release 1.4.0 --out coldstart.jsonl
+"""
+import argparse
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+from ml.model_io import rss_mb
+
+
+def measure() -> dict:
+    rss_start = rss_mb()
+    start = time.perf_counter()
+    from ml import predictor as ml_predictor
+
+    import_ms = (time.perf_counter() - start) * 1000
+    rss_import = rss_mb()
+
+    start = time.perf_counter()
+    instance = ml_predictor.get_predictor()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "model_version": instance.model_version,
+        "engine": instance.engine,
+        "import_ms": round(import_ms, 2),
+        "load_ms": round(load_ms, 2),
+        "rss_start_mb": round(rss_start, 1),
+        "rss_after_import_mb": round(rss_import, 1),
+        "rss_after_load_mb": round(rss_mb(), 1),
+        "mmap": ml_predictor.load_report.get("mmap"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el arranque en frío del predictor.")
+    parser.add_argument("--release", default=None, help="Etiqueta de la versión")
+    parser.add_argument("--out", default=None, help="Archivo JSONL al que añadir el reporte")
+    args = parser.parse_args(argv)
+
+    report = measure()
+    report["release"] = args.release
+    line = json.dumps(report, ensure_ascii=False)
+    print(line)
+    if args.out:
+        with open(args.out, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# ml/compiled_forest.py
+"""
+Evaluador de random forest sobre arreglos NumPy contiguos.
+
+Aplana todos los árboles de un RandomForestClassifier de sklearn en un único
+conjunto de arreglos (feature, threshold, hijos, valores por nodo) y los recorre
+de forma vectorizada para todas las filas y árboles a la vez. Evita la
+validación, el despacho de joblib y el bucle Python por árbol de
+`predict_proba`, que dominan la latencia cuando se evalúa una sola fila.
+
+Las mismas tablas por nodo permiten explicar una predicción (contributions):
+el cambio de probabilidad de cada arista se precalcula una vez, así que
+repartirlo entre las features cuesta lo mismo que un recorrido.
+
+Los arreglos pueden guardarse como .npy (save) y abrirse con mmap (open): los
+workers de uvicorn comparten entonces las mismas páginas, a diferencia de un
+forest de sklearn, cuyo Tree.__setstate__ copia los nodos a memoria privada.
+"""
+import json
+import logging
+import os
+import shutil
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("compiled_forest")
+
+_LEAF = -1  # sklearn.tree._tree.TREE_LEAF
+# Arreglos que se guardan en disco, incluidos los derivados de `value`
+_ARRAYS = (
+    "feature",
+    "threshold",
+    "left",
+    "right",
+    "value",
+    "roots",
+    "is_leaf",
+    "positive",
+    "left_delta",
+    "right_delta",
+)
+
+
+class CompiledForest:
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        is_leaf: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        positive: Optional[np.ndarray] = None,
+        left_delta: Optional[np.ndarray] = None,
+        right_delta: Optional[np.ndarray] = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.is_leaf = is_leaf
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.n_trees = len(roots)
+        # Probabilidad de la clase positiva en cada nodo y su cambio al bajar
+        # por cada hijo (0 en las hojas, que apuntan a sí mismas)
+        if positive is None:
+            positive = np.ascontiguousarray(value[:, -1])
+        self.positive = positive
+        self.left_delta = (
+            positive[left] - positive if left_delta is None else left_delta
+        )
+        self.right_delta = (
+            positive[right] - positive if right_delta is None else right_delta
+        )
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Construye el evaluador a partir de un forest de clasificación ya entrenado."""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators or not all(hasattr(e, "tree_") for e in estimators):
+            raise TypeError(
+                f"Modelo no soportado por el motor compilado: {type(model).__name__}"
+            )
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise TypeError("El motor compilado solo soporta una salida")
+
+        features, thresholds, lefts, rights, values, roots, leaves = (
+            [],
+            [],
+            [],
+            [],
+            [],
+            [],
+            [],
+        )
+        offset, max_depth = 0, 0
+        for est in estimators:
+            tree = est.tree_
+            n = tree.node_count
+            leaf = tree.children_left == _LEAF
+            idx = np.arange(n, dtype=np.intp)
+
+            # Las hojas apuntan a sí mismas: el recorrido puede seguir
+            # iterando sin máscaras hasta la profundidad máxima.
+            left = np.where(leaf, idx, tree.children_left) + offset
+            right = np.where(leaf, idx, tree.children_right) + offset
+            feature = np.where(leaf, 0, tree.feature)
+
+            # Mismo normalizado que DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :].astype(np.float64, copy=True)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+
+            features.append(feature)
+            thresholds.append(tree.threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(proba)
+            leaves.append(leaf)
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(
+                np.concatenate(thresholds), dtype=np.float64
+            ),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            is_leaf=np.concatenate(leaves),
+            max_depth=int(max_depth),
+            n_features=int(model.n_features_in_),
+        )
+
+    # -------------------- Arreglos compartidos --------------------
+    def save(self, directory: str, model_sha256: str) -> None:
+        """
+        Escribe un .npy por arreglo y meta.json en `directory`. Se arma en un
+        directorio temporal y se renombra de una vez; si otro proceso ya lo
+        publicó, se conserva el suyo.
+        """
+        tmp_dir = f"{directory}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            for name in _ARRAYS:
+                np.save(os.path.join(tmp_dir, name + ".npy"), getattr(self, name))
+            meta = {
+                "model_sha256": model_sha256,
+                "max_depth": self.max_depth,
+                "n_features": self.n_features,
+            }
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as fh:
+                json.dump(meta, fh, indent=2)
+            try:
+                os.replace(tmp_dir, directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def open(cls, directory: str, model_sha256: str) -> Optional["CompiledForest"]:
+        """
+        Abre los arreglos guardados con save() en modo mmap de solo lectura.
+        Devuelve None si faltan o si corresponden a otro modelo.
+        """
+        meta_path = os.path.join(directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("model_sha256") != model_sha256:
+            logger.warning("Arreglos de %s generados para otro modelo; se ignoran", directory)
+            return None
+        arrays = {
+            name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+            for name in _ARRAYS
+        }
+        return cls(
+            max_depth=int(meta["max_depth"]),
+            n_features=int(meta["n_features"]),
+            **arrays,
+        )
+
+    # -------------------- Recorrido --------------------
+    def _as_input(self, X: np.ndarray) -> np.ndarray:
+        # sklearn evalúa los árboles sobre float32; se replica para obtener
+        # exactamente las mismas decisiones en cada umbral.
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Se esperaban {self.n_features} features, se recibió {X.shape}"
+            )
+        return X
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Índice global de la hoja alcanzada, con forma (n_filas, n_árboles)."""
+        X = self._as_input(X)
+        rows = np.arange(X.shape[0], dtype=np.intp)[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        for depth in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            if depth % 4 == 3 and self.is_leaf[node].all():
+                break
+        return node
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.apply(X)
+        per_tree = self.value[leaves]  # (n_filas, n_árboles, n_clases)
+        # cumsum acumula árbol por árbol, en el mismo orden que sklearn,
+        # para que la suma en coma flotante sea idéntica.
+        proba = np.cumsum(per_tree, axis=1)[:, -1, :]
+        return proba / self.n_trees
+
+    def contributions(self, X: np.ndarray):
+        """
+        Contribución de cada feature a la probabilidad de la clase positiva
+        (método de Saabas): cada split suma a su feature el cambio de
+        probabilidad entre el nodo y el hijo elegido, promediado entre
+        árboles. Devuelve (bias, contribuciones (n_filas, n_features)), con
+        bias + contribuciones.sum(axis=1) == predict_proba(X)[:, 1] salvo
+        redondeo.
+        """
+        X = self._as_input(X)
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows, dtype=np.intp)[:, np.newaxis]
+        offsets = rows * self.n_features
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        totals = np.zeros(n_rows * self.n_features, dtype=np.float64)
+        for depth in range(self.max_depth):
+            feature = self.feature[node]
+            go_left = X[rows, feature] <= self.threshold[node]
+            delta = np.where(go_left, self.left_delta[node], self.right_delta[node])
+            totals += np.bincount(
+                (offsets + feature).ravel(),
+                weights=delta.ravel(),
+                minlength=totals.size,
+            )
+            node = np.where(go_left, self.left[node], self.right[node])
+            if depth % 4 == 3 and self.is_leaf[node].all():
+                break
+        bias = np.full(n_rows, self.positive[self.roots].mean())
+        return bias, totals.reshape(n_rows, self.n_features) / self.n_trees
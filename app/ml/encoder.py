@@ -0,0 +1,262 @@
+# ml/encoder.py
+"""
+Codificador columnar de features para el modelo.
+
+Traduce los enums de Pydantic (SmokingHabit, ECigaretteUse, DiabetesDiagnosis)
+a los códigos del modelo con tablas precalculadas, en vez de normalizar
+strings en cada llamada, y arma la matriz NumPy lista para predict_proba.
+Es el camino común para la evaluación individual, por lotes y el re-scoring
+de evaluaciones históricas (filas ORM).
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from schemas.schemas import DiabetesDiagnosis, ECigaretteUse, SmokingHabit
+
+FEATURE_ORDER = [
+    "Age",
+    "Sex",
+    "BMI",
+    "Salt",
+    "PhysActivity",
+    "Smoker",
+    "MentHlth",
+    "Alcohol",
+    "Vaper",
+    "Diabetes",
+    "HighChol",
+]
+
+_FIELDS = (
+    "weight_kg",
+    "height_cm",
+    "reduces_salt_intake",
+    "daily_physical_activity",
+    "smoking_habit",
+    "stress_days_last_month",
+    "alcohol_in_last_30_days",
+    "e_cigarette_use",
+    "diabetes_diagnosis",
+    "has_high_cholesterol",
+)
+
+
+def _with_values(codes: dict) -> dict:
+    """Indexa por el miembro del enum y por su valor (lo que guardan las filas ORM)."""
+    table = dict(codes)
+    table.update({member.value: code for member, code in codes.items()})
+    return table
+
+
+SMOKER_CODES = _with_values(
+    {
+        SmokingHabit.fuma_diario: 1,
+        SmokingHabit.fuma_ocasionalmente: 2,
+        SmokingHabit.exfumador: 3,
+        SmokingHabit.no_fuma: 4,
+    }
+)
+VAPER_CODES = _with_values(
+    {
+        ECigaretteUse.diariamente: 1,
+        ECigaretteUse.ocasionalmente: 2,
+        ECigaretteUse.rara_vez: 3,
+        ECigaretteUse.nunca_he_usado: 4,
+    }
+)
+DIABETES_CODES = _with_values(
+    {
+        DiabetesDiagnosis.si: 1,
+        DiabetesDiagnosis.no: 0,
+        DiabetesDiagnosis.prediabetes: 0,
+    }
+)
+
+# Sinónimos aceptados históricamente (texto libre en filas antiguas)
+_SMOKER_ALIASES = {
+    "fumo a diario": 1,
+    "diario": 1,
+    "daily": 1,
+    "fumo ocasionalmente": 2,
+    "ocasional": 2,
+    "occasionally": 2,
+    "exfumador": 3,
+    "ex-smoker": 3,
+    "former": 3,
+    "no fumo": 4,
+    "none": 4,
+    "nunca": 4,
+    "never": 4,
+}
+_VAPER_ALIASES = {
+    "diariamente": 1,
+    "daily": 1,
+    "ocasionalmente": 2,
+    "occasionally": 2,
+    "rara vez": 3,
+    "rarely": 3,
+    "nunca he usado": 4,
+    "nunca": 4,
+    "never": 4,
+}
+_DIABETES_YES = {"si", "sí", "yes", "type1", "type2"}
+_GENDER_MALE = {"hombre", "male", "m"}
+
+
+def _age_group(age: int) -> int:
+    bins = [
+        (18, 24),
+        (25, 29),
+        (30, 34),
+        (35, 39),
+        (40, 44),
+        (45, 49),
+        (50, 54),
+        (55, 59),
+        (60, 64),
+        (65, 69),
+        (70, 74),
+        (75, 79),
+    ]
+    for idx, (a, b) in enumerate(bins, start=1):
+        if a <= age <= b:
+            return idx
+    return 13  # 80+
+
+
+# Grupo de edad por edad real (0..129); fuera de rango cae en 13 como siempre
+AGE_GROUPS = np.array([_age_group(age) for age in range(130)], dtype=np.int64)
+
+
+@lru_cache(maxsize=256)
+def _legacy_code(kind: str, value: str) -> int:
+    value = value.strip().lower()
+    if kind == "smoker":
+        return _SMOKER_ALIASES.get(value, 4)
+    if kind == "vaper":
+        return _VAPER_ALIASES.get(value, 4)
+    return 1 if value in _DIABETES_YES else 0
+
+
+@lru_cache(maxsize=64)
+def gender_code(gender: Any) -> int:
+    return 1 if str(gender).strip().lower() in _GENDER_MALE else 0  # 1=Hombre
+
+
+def _code(table: dict, kind: str, value: Any) -> int:
+    code = table.get(value)
+    if code is None:
+        code = _legacy_code(kind, str(getattr(value, "value", value)))
+    return code
+
+
+def to_date(birth_date: Union[str, date]) -> date:
+    if isinstance(birth_date, date):
+        return birth_date
+    return _parse_date(birth_date)
+
+
+@lru_cache(maxsize=1024)
+def _parse_date(birth_date: str) -> date:
+    # Intenta varios formatos
+    for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(birth_date, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Formato de fecha no soportado: {birth_date}")
+
+
+def calculate_age(birth_date: Union[str, date], today: Optional[date] = None) -> int:
+    bd = to_date(birth_date)
+    today = today or date.today()
+    return today.year - bd.year - ((today.month, today.day) < (bd.month, bd.day))
+
+
+def calculate_bmi(weight_kg: float, height_cm: float) -> float:
+    if not height_cm:
+        raise ValueError("height_cm no puede ser 0")
+    return round(weight_kg / ((height_cm / 100) ** 2), 2)
+
+
+class EncodedBatch(NamedTuple):
+    matrix: np.ndarray  # (n, 11) en el orden de FEATURE_ORDER
+    bmi: List[float]
+    age: List[int]
+
+
+class FeatureEncoder:
+    feature_order = FEATURE_ORDER
+
+    def encode(self, data: Any, user_data: Optional[dict] = None) -> EncodedBatch:
+        """
+        Acepta un EvaluationCreate (o dict) junto con `user_data`
+        ({"birth_date", "gender"}), o una lista de filas ORM Evaluation; para
+        estas los datos del usuario salen de `row.user`, o de `user_data`
+        indexado por user_id si se pasa.
+        """
+        if isinstance(data, (list, tuple)):
+            pairs = []
+            for row in data:
+                if user_data is not None:
+                    user = user_data[row.user_id]
+                else:
+                    user = {"birth_date": row.user.birth_date, "gender": row.user.gender}
+                pairs.append((user, row))
+            return self.encode_pairs(pairs)
+        if user_data is None:
+            raise ValueError("user_data es obligatorio para una evaluación individual")
+        return self.encode_pairs([(user_data, data)])
+
+    def encode_pairs(
+        self, items: Sequence[Tuple[dict, Any]], today: Optional[date] = None
+    ) -> EncodedBatch:
+        """
+        Codifica pares (user_data, evaluación) columna por columna. La edad se
+        calcula a `today`, o a user_data["as_of"] si el par lo trae (re-scoring
+        de evaluaciones históricas a la fecha en que se hicieron).
+        """
+        n = len(items)
+        matrix = np.empty((n, len(FEATURE_ORDER)), dtype=np.float64)
+        if n == 0:
+            return EncodedBatch(matrix, [], [])
+
+        today = today or date.today()
+        users = [user for user, _ in items]
+        evaluations = [evaluation for _, evaluation in items]
+        by_key, by_attr = itemgetter(*_FIELDS), attrgetter(*_FIELDS)
+        columns = list(
+            zip(*[(by_key if isinstance(e, dict) else by_attr)(e) for e in evaluations])
+        )
+        (
+            weight,
+            height,
+            salt,
+            activity,
+            smoker,
+            stress,
+            alcohol,
+            vaper,
+            diabetes,
+            cholesterol,
+        ) = columns
+
+        ages = [calculate_age(u["birth_date"], u.get("as_of") or today) for u in users]
+        bmi = [calculate_bmi(w, h) for w, h in zip(weight, height)]
+
+        matrix[:, 0] = AGE_GROUPS[np.clip(ages, 0, len(AGE_GROUPS) - 1)]
+        matrix[:, 1] = [gender_code(u["gender"]) for u in users]
+        matrix[:, 2] = [round(b) for b in bmi]
+        matrix[:, 3] = np.array(salt, dtype=bool)
+        matrix[:, 4] = np.array(activity, dtype=bool)
+        matrix[:, 5] = [_code(SMOKER_CODES, "smoker", v) for v in smoker]
+        matrix[:, 6] = np.array(stress, dtype=np.float64)
+        matrix[:, 7] = np.array(alcohol, dtype=bool)
+        matrix[:, 8] = [_code(VAPER_CODES, "vaper", v) for v in vaper]
+        matrix[:, 9] = [_code(DIABETES_CODES, "diabetes", v) for v in diabetes]
+        matrix[:, 10] = np.array(cholesterol, dtype=bool)
+        return EncodedBatch(matrix, bmi, ages)
@@ -0,0 +1,226 @@
+# ml/executor.py
+"""
+Ejecutor de inferencia configurable.
+
+La evaluación del modelo es CPU y, en una ruta síncrona, ocupa el threadpool
+compartido de Starlette (el mismo que atiende /pressures o /auth/me). Este
+ejecutor la aísla:
+
+- "inline":  en el threadpool de anyio (el de Starlette).
+- "thread":  ThreadPoolExecutor dedicado.
+- "process": ProcessPoolExecutor; cada proceso precarga su propio modelo.
+
+En todos los modos la cola está acotada (se rechaza de inmediato al llenarse)
+y cada llamada tiene un timeout. Una llamada ocupa su lugar en la cola hasta
+que el pool la termina o la descarta, aunque el cliente haya dejado de
+esperar. Con un tier de respaldo configurado (ML_FALLBACK_TIER), al llegar a
+`fallback_at` pendientes las llamadas nuevas se evalúan con ese modelo más
+barato, en el mismo ejecutor y dentro de la misma cota y timeout.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+import anyio.to_thread
+
+from core.config import settings
+from ml.predictor import Prediction, get_predictor
+
+logger = logging.getLogger("inference_executor")
+
+MODES = ("inline", "thread", "process")
+
+
+class InferenceSaturated(Exception):
+    """La cola de inferencia está llena."""
+
+
+class InferenceTimeout(Exception):
+    """La inferencia no terminó dentro del timeout."""
+
+
+# Funciones de módulo: deben poder serializarse hacia los procesos hijos
+def _init_worker() -> None:
+    get_predictor()
+
+
+def _predict(
+    user_data: dict, evaluation_data: Any, fallback: bool = False
+) -> Prediction:
+    return get_predictor().predict(user_data, evaluation_data, fallback=fallback)
+
+
+def _predict_batch(
+    items: Sequence[Tuple[dict, Any]], fallback: bool = False
+) -> List[Prediction]:
+    return get_predictor().predict_batch(items, fallback=fallback)
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        mode: str = "inline",
+        max_workers: int = 2,
+        max_pending: int = 64,
+        timeout: Optional[float] = 5.0,
+        fallback: bool = False,
+        fallback_at: Optional[int] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Modo de ejecución desconocido: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.fallback = fallback
+        self.fallback_at = max_pending // 2 if fallback_at is None else fallback_at
+        self._pool = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="inference"
+            )
+        elif mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.degraded = 0
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise InferenceSaturated()
+            # Con la cola cargada, modelo barato: responde antes de agotar el timeout
+            degrade = self.fallback and self.pending >= self.fallback_at
+            if degrade:
+                self.degraded += 1
+            self.pending += 1
+        args = (*args, degrade)
+        # La ranura se libera cuando la llamada termina o se descarta de la
+        # cola, no cuando el cliente deja de esperar (timeout o desconexión)
+        try:
+            if self._pool is None:
+                call = self._submit_inline(fn, args)
+            else:
+                future = self._pool.submit(fn, *args)
+                future.add_done_callback(self._release)
+                call = asyncio.wrap_future(future)
+        except Exception:
+            self._release()
+            raise
+        try:
+            result = await asyncio.wait_for(call, self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise InferenceTimeout()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def _submit_inline(self, fn, args) -> asyncio.Future:
+        """
+        Corre la llamada en el threadpool de anyio con abandon_on_cancel: al
+        vencer el timeout la espera termina en el acto y el hilo sigue hasta
+        acabar. La ranura la libera quien reclame la llamada primero: el hilo
+        al terminar, o la tarea si se cancela antes de que el hilo empiece
+        (en ese caso el hilo ya no la ejecuta).
+        """
+        claim = threading.Lock()
+
+        def run():
+            if not claim.acquire(blocking=False):
+                return None
+            try:
+                return fn(*args)
+            finally:
+                self._release()
+
+        def abandoned(_task) -> None:
+            if claim.acquire(blocking=False):
+                self._release()
+
+        call = asyncio.ensure_future(
+            anyio.to_thread.run_sync(run, abandon_on_cancel=True)
+        )
+        call.add_done_callback(abandoned)
+        return call
+
+    async def predict(self, user_data: dict, evaluation_data: Any) -> Prediction:
+        return await self._submit(_predict, user_data, evaluation_data)
+
+    async def predict_batch(
+        self, items: Sequence[Tuple[dict, Any]]
+    ) -> List[Prediction]:
+        return await self._submit(_predict_batch, list(items))
+
+    def warm_up(self) -> None:
+        """En modo proceso, arranca los procesos (y carga sus modelos) sin esperar."""
+        if self.mode == "process":
+            for _ in range(self.max_workers):
+                self._pool.submit(_init_worker)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers if self._pool is not None else None,
+                "max_pending": self.max_pending,
+                "timeout_seconds": self.timeout,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "failed": self.failed,
+                "fallback_at": self.fallback_at if self.fallback else None,
+                "degraded": self.degraded,
+            }
+
+
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_inference_executor() -> InferenceExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = InferenceExecutor(
+                    mode=settings.ML_EXECUTOR_MODE,
+                    max_workers=settings.ML_EXECUTOR_WORKERS,
+                    max_pending=settings.ML_EXECUTOR_MAX_PENDING,
+                    timeout=settings.ML_EXECUTOR_TIMEOUT_SECONDS,
+                    fallback=bool(settings.ML_FALLBACK_TIER),
+                    fallback_at=settings.ML_FALLBACK_AT_PENDING,
+                )
+                logger.info("Ejecutor de inferencia: modo=%s", _executor.mode)
+    return _executor
+
+
+def shutdown_inference_executor() -> None:
+    if _executor is not None:
+        _executor.shutdown()
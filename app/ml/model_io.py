@@ -0,0 +1,42 @@
+# ml/model_io.py
+import hashlib
+import sys
+from typing import Optional
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 del archivo, leído por bloques para no cargarlo entero en memoria."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_model(path: str, mmap_mode: Optional[str] = None):
+    """
+    Carga el modelo con joblib. Con mmap_mode="r" los arreglos NumPy del
+    pickle se mapean de solo lectura en lugar de leerse a un buffer
+    (requiere un pickle guardado sin compresión). En un forest de sklearn
+    eso no los comparte entre procesos: Tree.__setstate__ copia nodos y
+    valores a memoria privada, así que cada worker conserva su copia de los
+    árboles. Para compartirlos, ver CompiledForest.save/open.
+    """
+    import joblib  # diferido: importar joblib/sklearn solo al cargar el modelo
+
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def rss_mb() -> float:
+    """Memoria residente actual del proceso, en MB."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # fuera de Linux: pico de RSS como aproximación
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,270 @@
+# ml/monitoring.py
+"""
+Monitoreo en línea de la inferencia con memoria fija.
+
+Cada vector codificado que pasa por el predictor suma en un histograma por
+feature (un bin por valor del dominio discreto, más desborde por debajo y
+por encima), además de histogramas de la probabilidad predicha y de la
+latencia por llamada. La actualización es un único np.bincount por lote, así
+que el costo en la ruta de inferencia es de microsegundos y la memoria no
+crece con el tráfico.
+
+Cada proceso escribe periódicamente su estado (y el de su modelo y su caché)
+en ML_MONITOR_SNAPSHOT_DIR/drift-<pid>.json; /admin/inference/drift combina
+esos archivos (workers de uvicorn y procesos de inferencia) sin leer la tabla
+`evaluations`. El drift se resume con el PSI de cada feature frente a una
+distribución de referencia con el mismo formato de snapshot, por ejemplo la
+de los datos de entrenamiento (desde app/):
+
+    python -m ml.monitoring reference --data train.npz --out ml/models/drift_reference.json
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from core.metrics import Histogram
+from ml.risk_table import DEFAULT_BMI_RANGE, grid_domains
+
+logger = logging.getLogger("inference_monitor")
+
+PROBABILITY_BINS = 20
+LATENCY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250]
+SNAPSHOT_PATTERN = "drift-*.json"
+
+
+def population_stability_index(
+    reference: Sequence[int], current: Sequence[int], eps: float = 1e-4
+) -> Optional[float]:
+    """PSI entre dos histogramas con los mismos bins (None si alguno está vacío)."""
+    ref = np.asarray(reference, dtype=float)
+    cur = np.asarray(current, dtype=float)
+    if ref.sum() == 0 or cur.sum() == 0:
+        return None
+    p = np.clip(ref / ref.sum(), eps, None)
+    q = np.clip(cur / cur.sum(), eps, None)
+    return round(float(np.sum((q - p) * np.log(q / p))), 5)
+
+
+class FeatureMonitor:
+    def __init__(
+        self,
+        domains: Optional[Sequence[tuple]] = None,
+        reference: Optional[dict] = None,
+    ):
+        self.domains = [tuple(d) for d in (domains or grid_domains(*DEFAULT_BMI_RANGE))]
+        self.low = np.array([lo for _, lo, _ in self.domains], dtype=np.int64)
+        # Bins por feature: [< mínimo] + un bin por valor + [> máximo]
+        self.sizes = np.array(
+            [hi - lo + 3 for _, lo, hi in self.domains], dtype=np.int64
+        )
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)[:-1]])
+        self.feature_counts = np.zeros(int(self.sizes.sum()), dtype=np.int64)
+        self.probability_counts = np.zeros(PROBABILITY_BINS, dtype=np.int64)
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.rows = 0
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.reference = reference
+        self._lock = threading.Lock()
+        # Datos del proceso que acompañan a cada snapshot (modelo, caché)
+        self.context: Optional[Callable[[], dict]] = None
+        self._snapshotter: Optional[threading.Thread] = None
+        self._directory: Optional[str] = None
+        self._stop = threading.Event()
+
+    # -------------------- Ruta de inferencia --------------------
+    def observe(
+        self,
+        matrix: np.ndarray,
+        probabilities: Sequence[float],
+        latency_ms: Optional[float] = None,
+    ) -> None:
+        """Suma un lote de vectores codificados, sus probabilidades y la latencia de la llamada."""
+        values = np.rint(np.asarray(matrix, dtype=float)).astype(np.int64)
+        bins = np.clip(values - self.low + 1, 0, self.sizes - 1) + self.offsets
+        feature_delta = np.bincount(bins.ravel(), minlength=self.feature_counts.size)
+        proba_bins = np.minimum(
+            (np.asarray(probabilities, dtype=float) * PROBABILITY_BINS).astype(
+                np.int64
+            ),
+            PROBABILITY_BINS - 1,
+        )
+        proba_delta = np.bincount(proba_bins, minlength=PROBABILITY_BINS)
+        with self._lock:
+            self.feature_counts += feature_delta
+            self.probability_counts += proba_delta
+            self.rows += len(values)
+            if latency_ms is not None:
+                self.latency_ms.observe(latency_ms)
+
+    # -------------------- Lectura --------------------
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = self.feature_counts.copy()
+            probability = self.probability_counts.tolist()
+            latency = self.latency_ms.snapshot()
+            rows = self.rows
+        features = {}
+        for (name, lo, hi), offset, size in zip(self.domains, self.offsets, self.sizes):
+            features[name] = {
+                "min": lo,
+                "max": hi,
+                "counts": counts[offset : offset + size].tolist(),
+            }
+        snapshot = {
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "taken_at": datetime.now(timezone.utc).isoformat(),
+            "rows": rows,
+            "features": features,
+            "probability": {"bins": PROBABILITY_BINS, "counts": probability},
+            "latency_ms": latency,
+        }
+        if self.context is not None:
+            snapshot["process"] = self.context()
+        return snapshot
+
+    # -------------------- Snapshots a disco --------------------
+    def write_snapshot(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"drift-{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp_path, path)  # escritura atómica
+        return path
+
+    def start_snapshots(self, directory: str, interval: float) -> None:
+        if self._snapshotter is not None or interval <= 0:
+            return
+
+        def _loop():
+            # El primero al arrancar: el proceso aparece en /admin sin esperar un intervalo
+            while True:
+                try:
+                    self.write_snapshot(directory)
+                except OSError:
+                    logger.exception("No se pudo escribir el snapshot de drift")
+                if self._stop.wait(interval):
+                    break
+
+        self._directory = directory
+        self._snapshotter = threading.Thread(
+            target=_loop, name="drift-snapshot", daemon=True
+        )
+        self._snapshotter.start()
+
+    def stop(self) -> None:
+        """Detiene los snapshots periódicos y escribe el último."""
+        self._stop.set()
+        if self._snapshotter is not None:
+            try:
+                self.write_snapshot(self._directory)
+            except OSError:
+                logger.exception("No se pudo escribir el snapshot de drift")
+
+
+def merge_snapshots(snapshots: List[dict]) -> Optional[dict]:
+    """Suma snapshots de varios procesos (mismos dominios) en uno solo."""
+    if not snapshots:
+        return None
+    merged = json.loads(json.dumps(snapshots[0]))
+    merged["pid"] = [s["pid"] for s in snapshots]
+    merged.pop("process", None)
+    for other in snapshots[1:]:
+        merged["rows"] += other["rows"]
+        for name, feature in merged["features"].items():
+            feature["counts"] = [
+                a + b for a, b in zip(feature["counts"], other["features"][name]["counts"])
+            ]
+        merged["probability"]["counts"] = [
+            a + b
+            for a, b in zip(
+                merged["probability"]["counts"], other["probability"]["counts"]
+            )
+        ]
+        latency, extra = merged["latency_ms"], other["latency_ms"]
+        total = latency["mean"] * latency["count"] + extra["mean"] * extra["count"]
+        latency["count"] += extra["count"]
+        latency["mean"] = round(total / latency["count"], 4) if latency["count"] else 0.0
+        latency["buckets"] = {
+            k: v + extra["buckets"].get(k, 0) for k, v in latency["buckets"].items()
+        }
+    return merged
+
+
+def read_snapshots(directory: str, max_age: Optional[float] = None) -> List[dict]:
+    """Snapshots del directorio; con `max_age`, solo los de procesos vivos (recientes)."""
+    snapshots = []
+    now = time.time()
+    for path in sorted(glob.glob(os.path.join(directory, SNAPSHOT_PATTERN))):
+        try:
+            if max_age is not None and now - os.path.getmtime(path) > max_age:
+                continue
+            with open(path, encoding="utf-8") as fh:
+                snapshots.append(json.load(fh))
+        except (OSError, ValueError):
+            continue  # archivo de un proceso a medio escribir
+    return snapshots
+
+
+def drift_report(snapshot: dict, reference: Optional[dict]) -> dict:
+    """PSI por feature y de la probabilidad frente a la referencia."""
+    if reference is None:
+        return {}
+    report = {}
+    for name, feature in snapshot["features"].items():
+        ref = reference["features"].get(name)
+        if ref is None or (ref["min"], ref["max"]) != (feature["min"], feature["max"]):
+            report[name] = None  # bins distintos: no comparables
+            continue
+        report[name] = population_stability_index(ref["counts"], feature["counts"])
+    report["probability"] = population_stability_index(
+        reference["probability"]["counts"], snapshot["probability"]["counts"]
+    )
+    return report
+
+
+def load_reference(path: Optional[str]) -> Optional[dict]:
+    if not path:
+        return None
+    if not os.path.exists(path):
+        logger.warning("Referencia de drift no encontrada: %s", path)
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monitoreo de drift de la inferencia.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ref = sub.add_parser("reference", help="Genera la distribución de referencia")
+    ref.add_argument("--data", required=True, help=".npz con X (y opcional y)")
+    ref.add_argument("--model", default=None, help="Modelo para el histograma de probabilidad")
+    ref.add_argument("--out", required=True)
+    args = parser.parse_args(argv)
+
+    data = np.load(args.data)
+    X = np.asarray(data["X"], dtype=float)
+    probabilities: Sequence[float] = []
+    if args.model:
+        from ml.model_io import load_model
+
+        probabilities = load_model(args.model).predict_proba(X)[:, 1]
+    monitor = FeatureMonitor()
+    monitor.observe(X, probabilities)
+    snapshot = monitor.snapshot()
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(snapshot, fh)
+    print(f"Referencia generada: {args.out} | filas={snapshot['rows']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,190 +1,515 @@
 # ml/predictor.py (ACTUALIZADO Y CORREGIDO)
-import joblib
+import logging
 import numpy as np
-from datetime import date, datetime
+import threading
+import time
 import os
-from typing import Any, Union
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-try:
-    from ..schemas.schemas import EvaluationCreate  # opcional para type hints
-except ImportError:
-    EvaluationCreate = Any  # fallback
+from core.cache import TTLCache
+from core.config import settings
+from ml.batching import MicroBatcher
+from ml.compiled_forest import CompiledForest
+from ml.encoder import FEATURE_ORDER, FeatureEncoder
+from ml.model_io import file_sha256, load_model, rss_mb
+from ml.monitoring import FeatureMonitor, load_reference
+from ml.registry import ModelRegistry
+from ml.risk_table import RiskTable
+
+logger = logging.getLogger("predictor")
+
+# Cortes de probabilidad entre niveles de riesgo: Bajo | Moderado | Alto
+RISK_CUTS = (0.30, 0.60)
+
+
+class Prediction(NamedTuple):
+    probability: float
+    risk_level: str
+    imc: float
+    age: int
+    model_version: Optional[str] = None
+    # Aporte de cada feature a la probabilidad (ver CompiledForest.contributions)
+    contributions: Optional[Dict[str, float]] = None
+
+
+class LoadedModel(NamedTuple):
+    """Todo lo que depende del archivo del modelo; se reemplaza de una sola vez."""
+
+    version: str
+    sha256: str
+    path: str
+    # None cuando el motor compilado se abre de los arreglos compartidos
+    model: Any
+    compiled: Optional[CompiledForest]
+    risk_table: Optional[RiskTable]
+    explainer: Optional[CompiledForest] = None
 
 
 class HypertensionPredictor:
-    def __init__(self, model_path: str):
+    def __init__(
+        self,
+        model_path: str,
+        engine: str = "sklearn",
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None,
+        risk_table_path: Optional[str] = None,
+        mmap_mode: Optional[str] = None,
+        version: Optional[str] = None,
+        expected_sha256: Optional[str] = None,
+        contributions: bool = False,
+    ):
+        if engine not in ("sklearn", "compiled"):
+            raise ValueError(f"Motor de inferencia desconocido: {engine}")
+        self.requested_engine = engine
+        self.mmap_mode = mmap_mode
+        self.with_contributions = contributions
+        # Caché de probabilidades por vector codificado (0 = deshabilitada)
+        self.cache = TTLCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.encoder = FeatureEncoder()
+        self.feature_order = list(FEATURE_ORDER)
+        # Micro-lotes entre peticiones concurrentes (opt-in, ver enable_batching)
+        self.batcher: Optional[MicroBatcher] = None
+        # Histogramas de features/probabilidad/latencia (ver ml/monitoring.py)
+        self.monitor: Optional[FeatureMonitor] = None
+        # Tier de respaldo para sobrecarga (ver ml/tiers.py y set_fallback)
+        self._fallback: Optional[LoadedModel] = None
+        self._active = self.load_bundle(
+            model_path, version, expected_sha256, risk_table_path
+        )
+
+    # -------------------- Modelo activo --------------------
+    @property
+    def active_bundle(self) -> LoadedModel:
+        """Modelo activo; quien lo guarda sigue usándolo aunque haya un swap."""
+        return self._active
+
+    @property
+    def model(self):
+        return self._active.model
+
+    @property
+    def model_version(self) -> str:
+        return self._active.version
+
+    @property
+    def model_sha256(self) -> str:
+        return self._active.sha256
+
+    @property
+    def compiled(self) -> Optional[CompiledForest]:
+        return self._active.compiled
+
+    @property
+    def risk_table(self) -> Optional[RiskTable]:
+        return self._active.risk_table
+
+    @property
+    def fallback_version(self) -> Optional[str]:
+        fallback = self._fallback
+        return fallback.version if fallback is not None else None
+
+    @property
+    def engine(self) -> str:
+        return "compiled" if self._active.compiled is not None else "sklearn"
+
+    def load_bundle(
+        self,
+        model_path: str,
+        version: Optional[str] = None,
+        expected_sha256: Optional[str] = None,
+        risk_table_path: Optional[str] = None,
+    ) -> LoadedModel:
+        """Carga, verifica y precalienta un modelo sin tocar el que está activo."""
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Modelo no encontrado: {model_path}")
-        self.model = joblib.load(model_path)
-        self.feature_order = [
-            "Age",
-            "Sex",
-            "BMI",
-            "Salt",
-            "PhysActivity",
-            "Smoker",
-            "MentHlth",
-            "Alcohol",
-            "Vaper",
-            "Diabetes",
-            "HighChol",
-        ]
-
-    # -------------------- Utilidades --------------------
-    def _to_date(self, birth_date: Union[str, date]) -> date:
-        if isinstance(birth_date, date):
-            return birth_date
-        # Intenta varios formatos
-        for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%d-%m-%Y"):
+        sha256 = file_sha256(model_path)
+        if expected_sha256 and sha256 != expected_sha256:
+            raise ValueError(f"Checksum inválido para {model_path}")
+        model, compiled = None, None
+        shared_dir = None
+        if self.mmap_mode and self.requested_engine == "compiled":
+            shared_dir = compiled_dir(model_path, sha256)
+            compiled = CompiledForest.open(shared_dir, sha256)
+        if compiled is None:
+            model = load_model(model_path, mmap_mode=self.mmap_mode)
+            if self.requested_engine == "compiled":
+                compiled = self._compile(model)
+                shared = (
+                    self._share(compiled, shared_dir, sha256)
+                    if compiled is not None and shared_dir
+                    else None
+                )
+                if shared is not None:
+                    # El forest de sklearn ya no hace falta: se libera su copia
+                    compiled, model = shared, None
+        explainer = compiled
+        if explainer is None and self.with_contributions:
             try:
-                return datetime.strptime(birth_date, fmt).date()
-            except ValueError:
-                continue
-        raise ValueError(f"Formato de fecha no soportado: {birth_date}")
-
-    def _calculate_age(self, birth_date: Union[str, date]) -> int:
-        bd = self._to_date(birth_date)
-        today = date.today()
-        return today.year - bd.year - ((today.month, today.day) < (bd.month, bd.day))
-
-    def _map_age_to_group(self, age: int) -> int:
-        bins = [
-            (18, 24),
-            (25, 29),
-            (30, 34),
-            (35, 39),
-            (40, 44),
-            (45, 49),
-            (50, 54),
-            (55, 59),
-            (60, 64),
-            (65, 69),
-            (70, 74),
-            (75, 79),
-        ]
-        for idx, (a, b) in enumerate(bins, start=1):
-            if a <= age <= b:
-                return idx
-        return 13  # 80+
-
-    def _calculate_bmi(self, weight_kg: float, height_cm: float) -> float:
-        if not height_cm:
-            raise ValueError("height_cm no puede ser 0")
-        return round(weight_kg / ((height_cm / 100) ** 2), 2)
-
-    def _get(self, obj, name: str):
-        if isinstance(obj, dict):
-            return obj[name]
-        return getattr(obj, name)
-
-    # -------------------- Normalización de categorías --------------------
-    def _normalize_smoker(self, value: Any) -> int:
-        if hasattr(value, "value"):
-            value = value.value
-        value = str(value).strip().lower()
-        mapping = {
-            "fumo a diario": 1,
-            "diario": 1,
-            "daily": 1,
-            "fumo ocasionalmente": 2,
-            "ocasional": 2,
-            "occasionally": 2,
-            "exfumador": 3,
-            "ex-smoker": 3,
-            "former": 3,
-            "no fumo": 4,
-            "none": 4,
-            "nunca": 4,
-            "never": 4,
-        }
-        return mapping.get(value, 4)
-
-    def _normalize_vaper(self, value: Any) -> int:
-        if hasattr(value, "value"):
-            value = value.value
-        value = str(value).strip().lower()
-        mapping = {
-            "diariamente": 1,
-            "daily": 1,
-            "ocasionalmente": 2,
-            "occasionally": 2,
-            "rara vez": 3,
-            "rarely": 3,
-            "nunca he usado": 4,
-            "nunca": 4,
-            "never": 4,
-        }
-        return mapping.get(value, 4)
+                explainer = CompiledForest.from_sklearn(model)
+            except TypeError:
+                explainer = None  # modelo sin árboles: predicciones sin contribuciones
+        risk_table = None
+        if risk_table_path:
+            risk_table = RiskTable.open(risk_table_path, sha256, self.feature_order)
+        bundle = LoadedModel(
+            version=version or sha256[:12],
+            sha256=sha256,
+            path=model_path,
+            model=model,
+            compiled=compiled,
+            risk_table=risk_table,
+            explainer=explainer,
+        )
+        # Precalentamiento: la primera llamada real no paga la inicialización
+        self._score_matrix(
+            np.ones((1, len(self.feature_order)), dtype=float), bundle
+        )
+        return bundle
+
+    def swap(self, bundle: LoadedModel) -> None:
+        """Activa un modelo ya cargado; las llamadas en curso terminan con el anterior."""
+        previous = self._active
+        self._active = bundle  # asignación atómica de una sola referencia
+        if self.cache is not None:
+            self.cache.clear()
+        logger.info(
+            "Modelo activado: versión=%s (antes %s)", bundle.version, previous.version
+        )
 
-    def _normalize_diabetes(self, value: Any) -> int:
-        if hasattr(value, "value"):
-            value = value.value
-        value = str(value).strip().lower()
-        return 1 if value in {"si", "sí", "yes", "type1", "type2"} else 0
+    def set_fallback(self, bundle: Optional[LoadedModel]) -> None:
+        """Modelo más barato que se usa con fallback=True (None = el activo)."""
+        self._fallback = bundle
+        if bundle is not None:
+            logger.info("Tier de respaldo: versión=%s", bundle.version)
 
-    def _normalize_gender(self, gender: str) -> int:
-        g = str(gender).strip().lower()
-        return 1 if g in {"hombre", "male", "m"} else 0  # 1=Hombre, 0=Mujer
+    def _bundle(self, fallback: bool) -> LoadedModel:
+        if fallback and self._fallback is not None:
+            return self._fallback
+        return self._active
+
+    def _compile(self, model):
+        """
+        Aplana el forest en arreglos NumPy y comprueba que reproduce
+        exactamente predict_proba; si no, se mantiene el motor de sklearn.
+        """
+        try:
+            compiled = CompiledForest.from_sklearn(model)
+        except TypeError as exc:
+            logger.warning("Motor compilado no disponible (%s); se usa sklearn", exc)
+            return None
+        rng = np.random.default_rng(0)
+        probe = rng.integers(0, 40, size=(64, len(self.feature_order))).astype(float)
+        if not np.array_equal(compiled.predict_proba(probe), model.predict_proba(probe)):
+            logger.warning("Motor compilado difiere de sklearn; se usa sklearn")
+            return None
+        return compiled
+
+    def _share(
+        self, compiled: CompiledForest, directory: str, sha256: str
+    ) -> Optional[CompiledForest]:
+        """
+        Publica los arreglos del forest compilado y los reabre con mmap, para
+        que todos los workers lean las mismas páginas. Devuelve None si el
+        directorio no es escribible (se sirve la copia privada).
+        """
+        try:
+            compiled.save(directory, sha256)
+        except OSError as exc:
+            logger.warning("No se pudo guardar %s (%s); copia privada", directory, exc)
+            return None
+        return CompiledForest.open(directory, sha256)
 
     # -------------------- Construcción de features --------------------
-    def _map_inputs_to_model_features(
-        self, age_group: int, gender: str, evaluation_data: Any
-    ) -> dict:
-        weight = self._get(evaluation_data, "weight_kg")
-        height = self._get(evaluation_data, "height_cm")
-        bmi = self._calculate_bmi(weight, height)
+    def _encode(self, user_data: dict, evaluation_data: Any):
+        """Devuelve (vector ordenado de features, imc, edad real)."""
+        encoded = self.encoder.encode_pairs([(user_data, evaluation_data)])
+        return encoded.matrix[0].tolist(), encoded.bmi[0], encoded.age[0]
+
+    @staticmethod
+    def risk_level(proba: float) -> str:
+        """Nivel de riesgo ("Bajo", "Moderado", "Alto") de una probabilidad."""
+        if proba < RISK_CUTS[0]:
+            return "Bajo"
+        if proba < RISK_CUTS[1]:
+            return "Moderado"
+        return "Alto"
+
+    def _score_matrix(
+        self, matrix: np.ndarray, bundle: Optional[LoadedModel] = None
+    ) -> np.ndarray:
+        """Probabilidad de la clase positiva para cada fila de la matriz."""
+        bundle = bundle or self._active
+        if bundle.compiled is not None:
+            return bundle.compiled.predict_proba(matrix)[:, 1]
+        return bundle.model.predict_proba(matrix)[:, 1]
+
+    def score_encoded(
+        self, matrix: np.ndarray, bundle: Optional[LoadedModel] = None
+    ) -> Tuple[np.ndarray, str]:
+        """
+        Evalúa una matriz ya codificada con `bundle` (por defecto, el modelo
+        activo), sin caché ni micro-lotes (procesos masivos). Devuelve
+        (probabilidades, versión).
+        """
+        active = bundle or self._active
+        return self._score_matrix(matrix, active), active.version
+
+    def explain_encoded(
+        self, matrix: np.ndarray, bundle: Optional[LoadedModel] = None
+    ) -> Tuple[np.ndarray, str, Optional[List[Dict[str, float]]]]:
+        """Como score_encoded, más las contribuciones de cada fila (si aplica)."""
+        active = bundle or self._active
+        return (
+            self._score_matrix(matrix, active),
+            active.version,
+            self._contributions(matrix, active),
+        )
+
+    def _contributions(
+        self, matrix: np.ndarray, bundle: LoadedModel
+    ) -> Optional[List[Dict[str, float]]]:
+        """Contribución por feature de cada fila, o None si no se calculan."""
+        if not self.with_contributions or bundle.explainer is None:
+            return None
+        _, contributions = bundle.explainer.contributions(matrix)
+        return [
+            {name: round(float(v), 5) for name, v in zip(self.feature_order, row)}
+            for row in contributions
+        ]
+
+    def stats(self) -> dict:
+        """Modelo, caché y micro-lotes de este proceso."""
         return {
-            "Age": age_group,
-            "Sex": self._normalize_gender(gender),
-            "BMI": round(bmi),
-            "Salt": 1 if self._get(evaluation_data, "reduces_salt_intake") else 0,
-            "PhysActivity": (
-                1 if self._get(evaluation_data, "daily_physical_activity") else 0
-            ),
-            "Smoker": self._normalize_smoker(
-                self._get(evaluation_data, "smoking_habit")
-            ),
-            "MentHlth": self._get(evaluation_data, "stress_days_last_month"),
-            "Alcohol": (
-                1 if self._get(evaluation_data, "alcohol_in_last_30_days") else 0
-            ),
-            "Vaper": self._normalize_vaper(
-                self._get(evaluation_data, "e_cigarette_use")
-            ),
-            "Diabetes": self._normalize_diabetes(
-                self._get(evaluation_data, "diabetes_diagnosis")
-            ),
-            "HighChol": 1 if self._get(evaluation_data, "has_high_cholesterol") else 0,
-        }, bmi
+            "model_version": self.model_version,
+            "fallback_version": self.fallback_version,
+            "engine": self.engine,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "batching": self.batcher.stats() if self.batcher is not None else None,
+        }
+
+    def enable_batching(self, window_ms: float, max_batch_size: int) -> None:
+        self.batcher = MicroBatcher(self._score_matrix, window_ms, max_batch_size)
+        self.batcher.start()
+
+    def disable_batching(self) -> None:
+        if self.batcher is not None:
+            self.batcher.stop()
+
+    def _score_rows(
+        self, rows: List[list], bundle: LoadedModel
+    ) -> Tuple[List[float], List[Optional[Dict[str, float]]]]:
+        """
+        Puntúa vectores ya codificados. Primero la caché, que guarda la
+        probabilidad junto con sus contribuciones; luego la tabla
+        precalculada; solo lo que falte llega al modelo, en una sola llamada.
+        Las contribuciones se calculan únicamente para las filas que no
+        estaban en caché. Devuelve (probabilidades, contribuciones).
+        """
+        explain = self.with_contributions and bundle.explainer is not None
+        probas: List[Optional[float]] = [None] * len(rows)
+        contributions: List[Optional[Dict[str, float]]] = [None] * len(rows)
+
+        missing = list(range(len(rows)))
+        if self.cache is not None:
+            keys = {i: (bundle.version, tuple(rows[i])) for i in missing}
+            for i in missing:
+                hit = self.cache.get(keys[i])
+                if hit is not None:
+                    probas[i], contributions[i] = hit
+            missing = [i for i in missing if probas[i] is None]
+        uncached = missing
+
+        if missing and bundle.risk_table is not None:
+            for i in missing:
+                probas[i] = bundle.risk_table.lookup(rows[i])
+            missing = [i for i in missing if probas[i] is None]
+
+        if missing:
+            pending = [rows[i] for i in missing]
+            batcher = self.batcher
+            if (
+                batcher is not None
+                and batcher.running
+                and len(pending) < batcher.max_batch_size
+            ):
+                scored = batcher.score(pending, bundle)
+            else:
+                scored = self._score_matrix(np.array(pending, dtype=float), bundle)
+            for i, p in zip(missing, scored):
+                probas[i] = float(p)
+
+        if explain and uncached:
+            explained = self._contributions(
+                np.array([rows[i] for i in uncached], dtype=float), bundle
+            )
+            for i, c in zip(uncached, explained):
+                contributions[i] = c
+
+        if self.cache is not None:
+            # Sin contribuciones los aciertos de la tabla no se guardan: son
+            # igual de baratos que la caché
+            for i in uncached if explain else missing:
+                self.cache.set(keys[i], (probas[i], contributions[i]))
+        return probas, contributions
 
     # -------------------- Predicción --------------------
-    def predict(self, user_data: dict, evaluation_data: Any):
-        age_real = self._calculate_age(user_data["birth_date"])
-        age_group = self._map_age_to_group(age_real)
-        features_dict, bmi = self._map_inputs_to_model_features(
-            age_group, user_data["gender"], evaluation_data
-        )
+    def predict(
+        self, user_data: dict, evaluation_data: Any, fallback: bool = False
+    ) -> Prediction:
+        start = time.perf_counter()
+        row, bmi, age_real = self._encode(user_data, evaluation_data)
 
-        # Ordenar vector
-        input_vector = np.array(
-            [features_dict[name] for name in self.feature_order], dtype=float
-        ).reshape(1, -1)
+        active = self._bundle(fallback)
+        probas, contributions = self._score_rows([row], active)
+        proba = probas[0]
+        if self.monitor is not None:
+            self.monitor.observe(
+                np.array([row], dtype=float),
+                [proba],
+                (time.perf_counter() - start) * 1000,
+            )
 
-        proba = float(self.model.predict_proba(input_vector)[0][1])
+        return Prediction(
+            proba,
+            self.risk_level(proba),
+            bmi,
+            age_real,
+            active.version,
+            contributions[0],
+        )
 
-        if proba < 0.30:
-            risk_level = "Bajo"
-        elif proba < 0.60:
-            risk_level = "Moderado"
-        else:
-            risk_level = "Alto"
+    def predict_batch(
+        self, items: Sequence[Tuple[dict, Any]], fallback: bool = False
+    ) -> List[Prediction]:
+        """
+        Evalúa N pares (user_data, evaluation_data) con una sola llamada a
+        predict_proba. Conserva el orden de entrada. Con fallback=True usa el
+        tier de respaldo, si hay uno cargado.
+        """
+        if not items:
+            return []
+        start = time.perf_counter()
+        encoded = self.encoder.encode_pairs(items)
 
-        # Devuelve la tupla esperada por el endpoint
-        return proba, risk_level, bmi, age_real
+        active = self._bundle(fallback)
+        probas, contributions = self._score_rows(encoded.matrix.tolist(), active)
+        if self.monitor is not None:
+            self.monitor.observe(
+                encoded.matrix, probas, (time.perf_counter() - start) * 1000
+            )
+
+        return [
+            Prediction(p, self.risk_level(p), bmi, age_real, active.version, c)
+            for p, bmi, age_real, c in zip(
+                probas, encoded.bmi, encoded.age, contributions
+            )
+        ]
 
 
-# Inicialización
-model_file_path = os.path.join(
-    os.path.dirname(__file__), "models", "modelo_rf_actualizado.pkl"
+# Inicialización diferida: el modelo se carga en la primera llamada a
+# get_predictor(), no al importar este módulo. Si el directorio de modelos
+# tiene manifest.json se usa la versión activa del registro; si no, el
+# archivo histórico. ML_MODEL_TIER / ML_FALLBACK_TIER eligen variantes
+# ligeras registradas con ml/tiers.py.
+model_file_path = os.path.join(settings.ML_MODELS_DIR, "modelo_rf_actualizado.pkl")
+registry = ModelRegistry(
+    settings.ML_MODELS_DIR,
+    tier=settings.ML_MODEL_TIER,
+    fallback_tier=settings.ML_FALLBACK_TIER,
 )
-predictor = HypertensionPredictor(model_path=model_file_path)
+_predictor: Optional[HypertensionPredictor] = None
+_predictor_lock = threading.Lock()
+load_report: dict = {}
+
+
+def compiled_dir(model_path: str, sha256: str) -> str:
+    """Directorio de los arreglos .npy del forest compilado de un modelo."""
+    return f"{model_path}.{sha256[:12]}.forest"
+
+
+def monitor_snapshot_dir() -> Optional[str]:
+    """
+    Directorio de snapshots de monitoreo. En modo "process" los contadores
+    viven en los procesos de inferencia, así que sin ML_MONITOR_SNAPSHOT_DIR
+    se usa uno dentro del directorio temporal.
+    """
+    if settings.ML_MONITOR_SNAPSHOT_DIR:
+        return settings.ML_MONITOR_SNAPSHOT_DIR
+    if settings.ML_EXECUTOR_MODE == "process":
+        return os.path.join(tempfile.gettempdir(), "atension-monitor")
+    return None
+
+
+def get_predictor() -> HypertensionPredictor:
+    """Devuelve el predictor del proceso, cargándolo la primera vez."""
+    global _predictor
+    if _predictor is not None:
+        return _predictor
+    with _predictor_lock:
+        if _predictor is None:
+            rss_before = rss_mb()
+            start = time.perf_counter()
+            entry = (
+                registry.resolve(tier=registry.tier) if registry.exists() else None
+            )
+            instance = HypertensionPredictor(
+                model_path=entry["path"] if entry else model_file_path,
+                engine=settings.ML_INFERENCE_ENGINE,
+                cache_size=settings.ML_CACHE_SIZE,
+                cache_ttl=settings.ML_CACHE_TTL_SECONDS,
+                risk_table_path=(
+                    entry and entry["risk_table"]
+                ) or settings.ML_RISK_TABLE_PATH,
+                mmap_mode="r" if settings.ML_MODEL_MMAP else None,
+                version=entry["version"] if entry else None,
+                expected_sha256=entry["sha256"] if entry else None,
+                contributions=settings.ML_FEATURE_CONTRIBUTIONS,
+            )
+            if entry:
+                registry.load_fallback(instance)
+                registry.watch(instance, settings.ML_REGISTRY_POLL_SECONDS)
+            elif settings.ML_MODEL_TIER or settings.ML_FALLBACK_TIER:
+                logger.warning("Los tiers requieren el registro (manifest.json)")
+            if settings.ML_MONITORING_ENABLED:
+                instance.monitor = FeatureMonitor(
+                    reference=load_reference(settings.ML_DRIFT_REFERENCE_PATH)
+                )
+                instance.monitor.context = lambda: {
+                    **instance.stats(),
+                    "load": load_report,
+                }
+                snapshot_dir = monitor_snapshot_dir()
+                if snapshot_dir:
+                    instance.monitor.start_snapshots(
+                        snapshot_dir, settings.ML_MONITOR_SNAPSHOT_SECONDS
+                    )
+            if settings.ML_BATCHING_ENABLED:
+                instance.enable_batching(
+                    settings.ML_BATCH_WINDOW_MS, settings.ML_BATCH_MAX_SIZE
+                )
+            load_report.update(
+                model_version=instance.model_version,
+                load_ms=round((time.perf_counter() - start) * 1000, 2),
+                rss_before_mb=round(rss_before, 1),
+                rss_after_mb=round(rss_mb(), 1),
+                mmap=settings.ML_MODEL_MMAP,
+            )
+            logger.info(
+                "Modelo cargado: versión=%s | Tiempo: %.2f ms | RSS: %.1f -> %.1f MB",
+                instance.model_version,
+                load_report["load_ms"],
+                load_report["rss_before_mb"],
+                load_report["rss_after_mb"],
+            )
+            _predictor = instance
+    return _predictor
+
+
+def shutdown_predictor() -> None:
+    """Detiene los hilos del predictor si llegó a cargarse."""
+    registry.stop()
+    if _predictor is not None:
+        _predictor.disable_batching()
+        if _predictor.monitor is not None:
+            _predictor.monitor.stop()
@@ -0,0 +1,293 @@
+# ml/registry.py
+"""
+Registro de modelos versionados.
+
+El directorio de modelos (settings.ML_MODELS_DIR) contiene los .pkl y un
+manifest.json:
+
+    {
+      "active": "2025-11-rf",
+      "models": {
+        "2025-11-rf": {"file": "2025-11-rf__rf_2025_11.pkl", "sha256": "…", "risk_table": null}
+      }
+    }
+
+El manifiesto es la fuente de verdad compartida por todos los workers: cada
+proceso lo vigila y, cuando cambia la versión activa, carga y precalienta el
+nuevo modelo en segundo plano y lo intercambia de forma atómica en su
+HypertensionPredictor, sin cortar peticiones en curso.
+
+CLI (desde app/):
+
+    python -m ml.registry list
+    python -m ml.registry register ruta/al/modelo.pkl --version 2025-11-rf [--activate]
+    python -m ml.registry activate 2025-11-rf
+
+Las variantes ligeras de un modelo (ml/tiers.py) se registran como
+"<versión>@<tier>" con "parent" y "tier"; si el proceso sirve un tier
+(ML_MODEL_TIER), al activar una versión se carga su variante.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from ml.model_io import file_sha256
+
+logger = logging.getLogger("model_registry")
+
+MANIFEST = "manifest.json"
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        models_dir: str,
+        tier: Optional[str] = None,
+        fallback_tier: Optional[str] = None,
+    ):
+        self.models_dir = models_dir
+        self.tier = tier
+        self.fallback_tier = fallback_tier
+        self.manifest_path = os.path.join(models_dir, MANIFEST)
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.status = {"state": "idle", "target": None, "error": None}
+
+    # -------------------- Manifiesto --------------------
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def manifest(self) -> dict:
+        if not self.exists():
+            return {"active": None, "models": {}}
+        with open(self.manifest_path, encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)  # escritura atómica
+
+    def tier_version(
+        self, version: str, tier: str, manifest: Optional[dict] = None
+    ) -> Optional[str]:
+        """Nombre de la variante `tier` de `version`, si está registrada."""
+        manifest = manifest or self.manifest()
+        candidate = f"{version}@{tier}"
+        return candidate if candidate in manifest["models"] else None
+
+    def resolve(
+        self, version: Optional[str] = None, tier: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        Entrada del manifiesto (con ruta absoluta) para `version` o la activa;
+        con `tier`, la de su variante si existe (si no, la de referencia).
+        """
+        manifest = self.manifest()
+        version = version or manifest.get("active")
+        if not version:
+            return None
+        if tier:
+            variant = self.tier_version(version, tier, manifest)
+            if variant is None:
+                logger.warning(
+                    "La versión %s no tiene tier %s; se usa la de referencia",
+                    version,
+                    tier,
+                )
+            version = variant or version
+        entry = manifest["models"].get(version)
+        if entry is None:
+            raise KeyError(f"Versión de modelo desconocida: {version}")
+        risk_table = entry.get("risk_table")
+        return {
+            "version": version,
+            "path": os.path.join(self.models_dir, entry["file"]),
+            "sha256": entry["sha256"],
+            "risk_table": (
+                os.path.join(self.models_dir, risk_table) if risk_table else None
+            ),
+        }
+
+    def register(
+        self,
+        source_path: str,
+        version: str,
+        risk_table: Optional[str] = None,
+        activate: bool = False,
+        parent: Optional[str] = None,
+        tier: Optional[str] = None,
+    ) -> dict:
+        os.makedirs(self.models_dir, exist_ok=True)
+        with self._lock:
+            manifest = self.manifest()
+            if version in manifest["models"]:
+                raise ValueError(f"La versión {version} ya está registrada")
+            if parent is not None and parent not in manifest["models"]:
+                raise KeyError(f"Versión de modelo desconocida: {parent}")
+            file_name = self.artifact_name(version, source_path)
+            if any(m["file"] == file_name for m in manifest["models"].values()):
+                raise ValueError(f"El archivo {file_name} ya pertenece a otra versión")
+            target = os.path.join(self.models_dir, file_name)
+            if os.path.abspath(source_path) != os.path.abspath(target):
+                # Nunca se escribe sobre un .pkl servido (los workers lo tienen
+                # mapeado en memoria): copia a un temporal y rename atómico
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                try:
+                    shutil.copy2(source_path, tmp_path)
+                    os.replace(tmp_path, target)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            manifest["models"][version] = {
+                "file": file_name,
+                "sha256": file_sha256(target),
+                "risk_table": risk_table,
+                "registered_at": datetime.now(timezone.utc).isoformat(),
+            }
+            if parent is not None:
+                manifest["models"][version].update(parent=parent, tier=tier)
+            if activate or not manifest.get("active"):
+                manifest["active"] = version
+            self._write_manifest(manifest)
+        return manifest["models"][version]
+
+    @staticmethod
+    def artifact_name(version: str, source_path: str) -> str:
+        """Nombre del .pkl dentro de models_dir, único por versión."""
+        prefix = re.sub(r"[^\w.@-]", "_", version) + "__"
+        base = os.path.basename(source_path)
+        return base if base.startswith(prefix) else prefix + base
+
+    def set_active(self, version: str) -> None:
+        with self._lock:
+            manifest = self.manifest()
+            if version not in manifest["models"]:
+                raise KeyError(f"Versión de modelo desconocida: {version}")
+            manifest["active"] = version
+            self._write_manifest(manifest)
+
+    # -------------------- Intercambio en caliente --------------------
+    def activate(self, predictor, version: str) -> None:
+        """
+        Marca `version` como activa para todos los workers y la carga en
+        segundo plano en este proceso.
+        """
+        self.set_active(version)
+        self.load_in_background(predictor, version)
+
+    def load_in_background(self, predictor, version: str) -> threading.Thread:
+        thread = threading.Thread(
+            target=self._load_and_swap,
+            args=(predictor, version),
+            name=f"model-load-{version}",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _load_entry(self, predictor, entry: dict):
+        return predictor.load_bundle(
+            entry["path"],
+            version=entry["version"],
+            expected_sha256=entry["sha256"],
+            risk_table_path=entry["risk_table"],
+        )
+
+    def load_fallback(self, predictor, version: Optional[str] = None) -> None:
+        """Carga en el predictor el tier de respaldo de `version` (o de la activa)."""
+        if not self.fallback_tier:
+            return
+        version = version or self.manifest().get("active")
+        variant = version and self.tier_version(version, self.fallback_tier)
+        if not variant:
+            logger.warning(
+                "La versión %s no tiene tier de respaldo %s", version, self.fallback_tier
+            )
+            predictor.set_fallback(None)
+            return
+        predictor.set_fallback(self._load_entry(predictor, self.resolve(variant)))
+
+    def _load_and_swap(self, predictor, version: str) -> None:
+        with self._lock:
+            if self.status["state"] == "loading":
+                return  # ya hay una carga en curso
+            self.status = {"state": "loading", "target": version, "error": None}
+        try:
+            entry = self.resolve(version, tier=self.tier)
+            predictor.swap(self._load_entry(predictor, entry))
+            self.load_fallback(predictor, version)
+            self.status = {"state": "idle", "target": version, "error": None}
+        except Exception as exc:
+            logger.exception("No se pudo activar el modelo %s", version)
+            self.status = {"state": "failed", "target": version, "error": str(exc)}
+
+    def serving_version(self, version: str) -> str:
+        """Versión que este proceso sirve cuando `version` es la activa."""
+        if self.tier:
+            return self.tier_version(version, self.tier) or version
+        return version
+
+    def watch(self, predictor, interval: float) -> None:
+        """Vigila el manifiesto y activa en este proceso la versión que indique."""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def _loop():
+            while not self._stop.wait(interval):
+                try:
+                    active = self.manifest().get("active")
+                except (OSError, ValueError):
+                    continue  # manifiesto a medio escribir o ausente
+                if (
+                    active
+                    and self.serving_version(active) != predictor.model_version
+                    and self.status["target"] != active
+                ):
+                    self._load_and_swap(predictor, active)
+
+        self._watcher = threading.Thread(target=_loop, name="model-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main(argv=None):
+    from core.config import settings
+
+    parser = argparse.ArgumentParser(description="Registro de modelos versionados.")
+    parser.add_argument("--models-dir", default=settings.ML_MODELS_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    reg = sub.add_parser("register")
+    reg.add_argument("file")
+    reg.add_argument("--version", required=True)
+    reg.add_argument("--risk-table", default=None)
+    reg.add_argument("--activate", action="store_true")
+    act = sub.add_parser("activate")
+    act.add_argument("version")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.models_dir)
+    if args.command == "register":
+        entry = registry.register(
+            args.file, args.version, risk_table=args.risk_table, activate=args.activate
+        )
+        print(f"Registrado {args.version}: {entry['file']} ({entry['sha256'][:12]})")
+    elif args.command == "activate":
+        registry.set_active(args.version)
+        print(f"Versión activa: {args.version}")
+    print(json.dumps(registry.manifest(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# ml/rescore.py
+"""
+Re-scoring masivo de evaluaciones históricas tras un cambio de modelo.
+
+Recorre `evaluations` por páginas de clave (`id > último LIMIT n`), en
+bloques de tamaño fijo, reconstruye edad/sexo desde `users` (edad a la fecha
+de cada evaluación), evalúa cada bloque con una sola llamada vectorizada y
+escribe probability, risk_level, model_version y feature_contributions con
+UPDATE masivos por clave primaria. La memoria es constante sin importar el tamaño de la tabla y el
+progreso (último id procesado) se guarda tras cada bloque para poder reanudar;
+un archivo de estado de otra versión del modelo se descarta y el job vuelve a
+empezar.
+
+Uso (desde app/):
+
+    python -m ml.rescore --chunk-size 2000 --state-file rescore_state.json
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import select, update
+
+from db import models
+from db.base import SessionLocal, get_engine
+from ml.predictor import get_predictor
+
+logger = logging.getLogger("rescore")
+
+
+def _load_state(path: Optional[str]) -> dict:
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    return {}
+
+
+def _save_state(path: Optional[str], state: dict) -> None:
+    if not path:
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp_path, path)
+
+
+def rescore(
+    chunk_size: int = 1000,
+    after_id: Optional[int] = None,
+    state_file: Optional[str] = None,
+    dry_run: bool = False,
+) -> dict:
+    predictor = get_predictor()
+    # Un solo modelo por corrida: un cambio de versión del registro a mitad
+    # del job no mezcla versiones (la nueva queda para la próxima corrida)
+    bundle = predictor.active_bundle
+    logger.info("Re-scoring con el modelo %s", bundle.version)
+    state = _load_state(state_file)
+    if state and state.get("model_version") != bundle.version:
+        # El progreso guardado es de otro modelo: reanudar saltaría filas que
+        # este modelo todavía no evaluó
+        logger.warning(
+            "Estado de %s para el modelo %s; se reinicia desde el principio",
+            state_file,
+            state.get("model_version"),
+        )
+        state = {}
+    if after_id is None:
+        after_id = state.get("last_id", 0)
+
+    E, U = models.Evaluation, models.User
+    stmt = (
+        select(
+            E.id,
+            E.created_at,
+            E.weight_kg,
+            E.height_cm,
+            E.reduces_salt_intake,
+            E.daily_physical_activity,
+            E.smoking_habit,
+            E.stress_days_last_month,
+            E.alcohol_in_last_30_days,
+            E.e_cigarette_use,
+            E.diabetes_diagnosis,
+            E.has_high_cholesterol,
+            U.birth_date,
+            U.gender,
+        )
+        .join(U, U.id == E.user_id)
+        .order_by(E.id)
+        .limit(chunk_size)
+    )
+
+    processed = 0
+    last_id = after_id
+    start_time = time.time()
+    engine = get_engine()
+    while True:
+        # Una sesión por bloque: la página se lee completa antes de escribir,
+        # así la lectura no tiene un cursor abierto mientras otra conexión
+        # hace commit (sqlite lo rechaza con "database is locked")
+        with SessionLocal(bind=engine) as db:
+            chunk = db.execute(stmt.where(E.id > last_id)).all()
+            if not chunk:
+                break
+            items = [
+                (
+                    {
+                        "birth_date": row.birth_date,
+                        "gender": row.gender,
+                        "as_of": row.created_at.date() if row.created_at else None,
+                    },
+                    row,
+                )
+                for row in chunk
+            ]
+            encoded = predictor.encoder.encode_pairs(items)
+            probas, version, contributions = predictor.explain_encoded(
+                encoded.matrix, bundle
+            )
+            contributions = contributions or [None] * len(chunk)
+            params = [
+                {
+                    "id": row.id,
+                    "probability": float(p),
+                    "risk_level": predictor.risk_level(float(p)),
+                    "model_version": version,
+                    "feature_contributions": c,
+                }
+                for row, p, c in zip(chunk, probas, contributions)
+            ]
+            if not dry_run:
+                db.execute(update(E), params)
+                db.commit()
+
+        last_id = chunk[-1].id
+        processed += len(chunk)
+        state = {
+            "last_id": last_id,
+            "model_version": version,
+            "processed": state.get("processed", 0) + len(chunk),
+        }
+        if not dry_run:
+            _save_state(state_file, state)
+        logger.info(
+            "Re-scoring: bloque hasta id=%s | filas=%s | acumulado=%s",
+            last_id,
+            len(chunk),
+            processed,
+        )
+
+    return {
+        "processed": processed,
+        "last_id": state.get("last_id", after_id),
+        "model_version": bundle.version,
+        "dry_run": dry_run,
+        "seconds": round(time.time() - start_time, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recalcula probability/risk_level de las evaluaciones guardadas."
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument(
+        "--after-id",
+        type=int,
+        default=None,
+        help="Procesa ids mayores a este (por defecto, el del archivo de estado)",
+    )
+    parser.add_argument(
+        "--state-file", default=None, help="JSON de progreso para reanudar"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="No escribe en la base")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+    result = rescore(args.chunk_size, args.after_id, args.state_file, args.dry_run)
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
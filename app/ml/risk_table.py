@@ -0,0 +1,175 @@
+# ml/risk_table.py
+"""
+Tabla de riesgo precalculada sobre todo el espacio discreto de features.
+
+Cada feature del modelo es un entero acotado (grupo de edad, sexo, IMC
+redondeado, banderas, códigos de tabaco/vapeo, días de estrés), así que el
+modelo puede evaluarse una sola vez sobre la malla completa. El resultado se
+guarda cuantizado (uint16) en un .npy que se abre con mmap: todos los workers
+de uvicorn comparten las mismas páginas y la inferencia es aritmética de
+índices.
+
+Construcción (desde app/):
+
+    python -m ml.risk_table --model ml/models/modelo_rf_actualizado.pkl \\
+        --out ml/models/risk_table.npy
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from ml.model_io import file_sha256
+
+logger = logging.getLogger("risk_table")
+
+SCALE = 65535  # uint16
+DEFAULT_BMI_RANGE = (12, 60)
+
+
+def grid_domains(bmi_min: int, bmi_max: int) -> List[tuple]:
+    """(feature, mínimo, máximo) en el orden de columnas del modelo."""
+    return [
+        ("Age", 1, 13),
+        ("Sex", 0, 1),
+        ("BMI", bmi_min, bmi_max),
+        ("Salt", 0, 1),
+        ("PhysActivity", 0, 1),
+        ("Smoker", 1, 4),
+        ("MentHlth", 0, 30),
+        ("Alcohol", 0, 1),
+        ("Vaper", 1, 4),
+        ("Diabetes", 0, 1),
+        ("HighChol", 0, 1),
+    ]
+
+
+def _meta_path(path: str) -> str:
+    return path + ".json"
+
+
+class RiskTable:
+    def __init__(self, table: np.ndarray, domains: Sequence[tuple]):
+        self.table = table
+        self.low = np.array([lo for _, lo, _ in domains], dtype=np.int64)
+        self.high = np.array([hi for _, _, hi in domains], dtype=np.int64)
+        sizes = self.high - self.low + 1
+        # Strides en orden C: la primera feature varía más lento
+        self.strides = np.concatenate([np.cumprod(sizes[::-1])[::-1][1:], [1]])
+        self._low = self.low.tolist()
+        self._high = self.high.tolist()
+        self._strides = self.strides.tolist()
+
+    @classmethod
+    def open(
+        cls, path: str, model_sha256: str, feature_order: Sequence[str]
+    ) -> Optional["RiskTable"]:
+        """
+        Abre la tabla en modo mmap. Devuelve None (y el predictor usa el
+        modelo) si falta, si corresponde a otro modelo o a otro orden de features.
+        """
+        if not os.path.exists(path) or not os.path.exists(_meta_path(path)):
+            logger.warning("Tabla de riesgo no encontrada: %s", path)
+            return None
+        with open(_meta_path(path), encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("model_sha256") != model_sha256:
+            logger.warning(
+                "Tabla de riesgo %s generada para otro modelo; se ignora", path
+            )
+            return None
+        domains = [tuple(d) for d in meta["domains"]]
+        if [name for name, _, _ in domains] != list(feature_order):
+            logger.warning("Tabla de riesgo %s con otro orden de features", path)
+            return None
+        table = np.load(path, mmap_mode="r")
+        if table.size != int(np.prod([hi - lo + 1 for _, lo, hi in domains])):
+            logger.warning("Tabla de riesgo %s incompleta; se ignora", path)
+            return None
+        return cls(table, domains)
+
+    def lookup(self, row: Sequence) -> Optional[float]:
+        """Probabilidad para un vector codificado, o None si cae fuera de la malla."""
+        index = 0
+        for value, lo, hi, stride in zip(row, self._low, self._high, self._strides):
+            v = int(value)
+            if v != value or v < lo or v > hi:
+                return None
+            index += (v - lo) * stride
+        return int(self.table[index]) / SCALE
+
+
+def build(
+    model_path: str,
+    out_path: str,
+    bmi_min: int = DEFAULT_BMI_RANGE[0],
+    bmi_max: int = DEFAULT_BMI_RANGE[1],
+    chunk_size: int = 1 << 18,
+) -> dict:
+    """Evalúa la malla completa con el modelo y escribe la tabla + metadatos."""
+    import joblib
+
+    model = joblib.load(model_path)
+    domains = grid_domains(bmi_min, bmi_max)
+    low = np.array([lo for _, lo, _ in domains], dtype=np.int64)
+    sizes = np.array([hi - lo + 1 for _, lo, hi in domains], dtype=np.int64)
+    total = int(np.prod(sizes))
+
+    tmp_path = out_path + ".tmp.npy"
+    table = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.uint16, shape=(total,)
+    )
+    start_time = time.time()
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        flat = np.arange(start, stop, dtype=np.int64)
+        # Descompone el índice plano en dígitos de base mixta (orden C)
+        digits = np.empty((stop - start, len(domains)), dtype=np.float64)
+        for col in range(len(domains) - 1, -1, -1):
+            flat, digit = np.divmod(flat, sizes[col])
+            digits[:, col] = digit + low[col]
+        proba = model.predict_proba(digits)[:, 1]
+        table[start:stop] = np.rint(np.clip(proba, 0.0, 1.0) * SCALE).astype(
+            np.uint16
+        )
+    table.flush()
+    del table
+    os.replace(tmp_path, out_path)
+
+    meta = {
+        "model_sha256": file_sha256(model_path),
+        "domains": domains,
+        "dtype": "uint16",
+        "scale": SCALE,
+        "entries": total,
+        "build_seconds": round(time.time() - start_time, 2),
+    }
+    with open(_meta_path(out_path), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, indent=2)
+    return meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Precalcula la tabla de riesgo sobre todo el espacio de features."
+    )
+    parser.add_argument("--model", required=True, help="Ruta al .pkl del modelo")
+    parser.add_argument("--out", required=True, help="Ruta del .npy a generar")
+    parser.add_argument("--bmi-min", type=int, default=DEFAULT_BMI_RANGE[0])
+    parser.add_argument("--bmi-max", type=int, default=DEFAULT_BMI_RANGE[1])
+    parser.add_argument("--chunk-size", type=int, default=1 << 18)
+    args = parser.parse_args(argv)
+
+    meta = build(args.model, args.out, args.bmi_min, args.bmi_max, args.chunk_size)
+    print(
+        f"Tabla generada: {args.out} | entradas={meta['entries']} | "
+        f"modelo={meta['model_sha256'][:12]} | {meta['build_seconds']} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
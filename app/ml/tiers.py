@@ -0,0 +1,414 @@
+# ml/tiers.py
+"""
+Variantes ligeras (tiers) del modelo de referencia.
+
+El número y la profundidad de los árboles se eligieron por precisión offline,
+no por costo de servicio. Este módulo deriva modelos más baratos a partir del
+de referencia y mide qué se pierde con cada uno:
+
+- "trees-<n>":        los primeros n árboles del forest (sin reentrenar).
+- "shallow-<d>x<n>":  forest de n árboles de profundidad d destilado sobre
+                      las probabilidades del modelo de referencia.
+- "logistic":         regresión logística destilada (one-hot en edad,
+                      tabaco y vapeo).
+- "lookup":           el modelo de referencia servido desde la tabla de
+                      riesgo precalculada (ml/risk_table.py).
+
+El reporte compara cada tier contra el de referencia (AUC, Brier, error de
+calibración, diferencia de probabilidad, acuerdo en el nivel de riesgo) junto
+con latencia y tamaño. Con --register cada tier queda en el manifiesto como
+"<versión>@<tier>"; ML_MODEL_TIER elige cuál servir y ML_FALLBACK_TIER cuál
+usar cuando el ejecutor de inferencia está saturado.
+
+Desde app/:
+
+    python -m ml.tiers --tiers trees-25 shallow-8x50 logistic --report tiers.json
+    python -m ml.tiers --tiers trees-25 logistic lookup --register
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from ml import risk_table
+from ml.compiled_forest import CompiledForest
+from ml.encoder import FEATURE_ORDER
+from ml.model_io import load_model
+from ml.predictor import RISK_CUTS
+from ml.registry import ModelRegistry
+
+logger = logging.getLogger("model_tiers")
+
+LOGISTIC_ONEHOT = [0, 5, 8]  # Age, Smoker, Vaper
+
+
+# -------------------- Derivación --------------------
+def truncate_forest(model, n_trees: int):
+    """Copia del forest con solo sus primeros `n_trees` árboles."""
+    if not 0 < n_trees <= len(model.estimators_):
+        raise ValueError(f"El forest tiene {len(model.estimators_)} árboles")
+    small = copy.copy(model)
+    small.estimators_ = model.estimators_[:n_trees]
+    small.n_estimators = n_trees
+    return small
+
+
+def _soft_targets(X: np.ndarray, proba: np.ndarray):
+    """
+    Destilación con etiquetas blandas: cada fila aparece como positiva con
+    peso p y como negativa con peso 1 - p.
+    """
+    X2 = np.vstack([X, X])
+    y2 = np.concatenate([np.ones(len(X), dtype=int), np.zeros(len(X), dtype=int)])
+    return X2, y2, np.concatenate([proba, 1.0 - proba])
+
+
+def distill_forest(X: np.ndarray, proba: np.ndarray, max_depth: int, n_trees: int):
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = RandomForestClassifier(
+        n_estimators=n_trees, max_depth=max_depth, n_jobs=-1, random_state=0
+    )
+    X2, y2, weight = _soft_targets(X, proba)
+    return model.fit(X2, y2, sample_weight=weight)
+
+
+def distill_logistic(X: np.ndarray, proba: np.ndarray):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    model = Pipeline(
+        [
+            (
+                "onehot",
+                ColumnTransformer(
+                    [("cat", OneHotEncoder(handle_unknown="ignore"), LOGISTIC_ONEHOT)],
+                    remainder="passthrough",
+                ),
+            ),
+            ("logit", LogisticRegression(max_iter=2000)),
+        ]
+    )
+    X2, y2, weight = _soft_targets(X, proba)
+    return model.fit(X2, y2, logit__sample_weight=weight)
+
+
+def derive(reference, tier: str, X: np.ndarray, proba: np.ndarray):
+    """Modelo del tier `tier`; para "lookup" devuelve el propio modelo de referencia."""
+    if tier.startswith("trees-"):
+        return truncate_forest(reference, int(tier.split("-", 1)[1]))
+    if tier.startswith("shallow-"):
+        depth, n_trees = tier.split("-", 1)[1].split("x")
+        return distill_forest(X, proba, int(depth), int(n_trees))
+    if tier == "logistic":
+        return distill_logistic(X, proba)
+    if tier == "lookup":
+        return reference
+    raise ValueError(f"Tier desconocido: {tier}")
+
+
+# -------------------- Datos de evaluación --------------------
+def grid_sample(n: int, seed: int) -> np.ndarray:
+    """Filas uniformes sobre los dominios de la tabla de riesgo."""
+    rng = np.random.default_rng(seed)
+    domains = risk_table.grid_domains(*risk_table.DEFAULT_BMI_RANGE)
+    return np.column_stack(
+        [rng.integers(lo, hi + 1, n) for _, lo, hi in domains]
+    ).astype(float)
+
+
+def load_data(path: Optional[str], n_train: int, n_eval: int, seed: int):
+    """
+    (X_train, X_eval, y_eval). Con --data (.npz con "X" y opcionalmente "y",
+    filas ya codificadas) se usan datos reales; si no, la malla uniforme y
+    y_eval=None (se sortean etiquetas a partir del modelo de referencia).
+    """
+    if path is None:
+        return grid_sample(n_train, seed), grid_sample(n_eval, seed + 1), None
+    data = np.load(path)
+    X = np.asarray(data["X"], dtype=float)
+    y = np.asarray(data["y"], dtype=int) if "y" in data.files else None
+    order = np.random.default_rng(seed).permutation(len(X))
+    cut = max(len(X) - n_eval, len(X) // 2)
+    train, test = order[:cut], order[cut:]
+    return X[train], X[test], (y[test] if y is not None else None)
+
+
+# -------------------- Métricas --------------------
+def calibration_error(proba: np.ndarray, y: np.ndarray, bins: int = 10) -> float:
+    """Error de calibración esperado (ECE) con bins de igual ancho."""
+    idx = np.minimum((proba * bins).astype(int), bins - 1)
+    total = 0.0
+    for b in range(bins):
+        mask = idx == b
+        if mask.any():
+            total += mask.sum() * abs(proba[mask].mean() - y[mask].mean())
+    return total / len(proba)
+
+
+def _scorer(model, engine: str, table: Optional[risk_table.RiskTable] = None):
+    """Función fila(s) -> probabilidad con el mismo camino que usaría el predictor."""
+    if table is not None:
+
+        def lookup(X):
+            proba = np.empty(len(X))
+            for i, row in enumerate(X):
+                p = table.lookup(row)
+                if p is None:  # fuera de la malla: el predictor usa el modelo
+                    p = model.predict_proba(row[np.newaxis, :])[0, 1]
+                proba[i] = p
+            return proba
+
+        return lookup
+    if engine == "compiled":
+        try:
+            compiled = CompiledForest.from_sklearn(model)
+            return lambda X: compiled.predict_proba(X)[:, 1]
+        except TypeError:
+            pass
+    return lambda X: model.predict_proba(X)[:, 1]
+
+
+def _latency(score: Callable, X: np.ndarray, iterations: int) -> Dict[str, float]:
+    single = []
+    for i in range(iterations):
+        row = X[i % len(X)][np.newaxis, :]
+        start = time.perf_counter()
+        score(row)
+        single.append((time.perf_counter() - start) * 1000)
+    batch = X[:256]
+    start = time.perf_counter()
+    for _ in range(max(iterations // 50, 3)):
+        score(batch)
+    batch_ms = (time.perf_counter() - start) * 1000 / max(iterations // 50, 3)
+    return {
+        "single_p50_ms": round(float(np.percentile(single, 50)), 4),
+        "single_p95_ms": round(float(np.percentile(single, 95)), 4),
+        "batch256_ms": round(batch_ms, 4),
+    }
+
+
+def _size(model, path: Optional[str]) -> Dict[str, float]:
+    nodes = None
+    if hasattr(model, "estimators_"):
+        nodes = int(sum(e.tree_.node_count for e in model.estimators_))
+    size = os.path.getsize(path) / (1024 * 1024) if path else None
+    return {"nodes": nodes, "file_mb": round(size, 2) if size is not None else None}
+
+
+def evaluate(
+    score: Callable,
+    X: np.ndarray,
+    y: np.ndarray,
+    reference_proba: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, Dict[str, float]]:
+    from sklearn.metrics import brier_score_loss, roc_auc_score
+
+    proba = np.asarray(score(X), dtype=float)
+    metrics = {
+        "auc": round(float(roc_auc_score(y, proba)), 5),
+        "brier": round(float(brier_score_loss(y, proba)), 5),
+        "ece": round(float(calibration_error(proba, y)), 5),
+    }
+    if reference_proba is not None:
+        diff = np.abs(proba - reference_proba)
+        metrics["mean_abs_diff"] = round(float(diff.mean()), 5)
+        metrics["max_abs_diff"] = round(float(diff.max()), 5)
+        metrics["risk_level_agreement"] = round(
+            float(
+                (
+                    np.digitize(proba, RISK_CUTS)
+                    == np.digitize(reference_proba, RISK_CUTS)
+                ).mean()
+            ),
+            5,
+        )
+    return proba, metrics
+
+
+# -------------------- Reporte --------------------
+def build_report(
+    model_path: str,
+    tiers,
+    out_dir: str,
+    data_path: Optional[str] = None,
+    n_train: int = 200_000,
+    n_eval: int = 50_000,
+    engine: str = "compiled",
+    iterations: int = 500,
+    seed: int = 0,
+) -> dict:
+    """Deriva cada tier, lo guarda en `out_dir` y lo compara con el de referencia."""
+    import joblib
+
+    os.makedirs(out_dir, exist_ok=True)
+    reference = load_model(model_path)
+    X_train, X_eval, y_eval = load_data(data_path, n_train, n_eval, seed)
+    reference_score = _scorer(reference, engine)
+    train_proba = reference_score(X_train)
+    eval_proba = reference_score(X_eval)
+    labels = "data"
+    if y_eval is None:
+        # Sin etiquetas reales: se sortean con la probabilidad de referencia
+        y_eval = (np.random.default_rng(seed + 2).random(len(X_eval)) < eval_proba)
+        y_eval = y_eval.astype(int)
+        labels = "pseudo"
+
+    _, ref_metrics = evaluate(reference_score, X_eval, y_eval)
+    report = {
+        "reference": {
+            "path": model_path,
+            **ref_metrics,
+            **_latency(reference_score, X_eval, iterations),
+            **_size(reference, model_path),
+        },
+        "labels": labels,
+        "eval_rows": int(len(X_eval)),
+        "engine": engine,
+        "tiers": {},
+    }
+
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    for tier in tiers:
+        start = time.perf_counter()
+        model = derive(reference, tier, X_train, train_proba)
+        table = None
+        table_path = None
+        if tier == "lookup":
+            path = model_path
+            table_path = os.path.join(out_dir, f"{stem}__risk_table.npy")
+            meta = risk_table.build(model_path, table_path)
+            table = risk_table.RiskTable.open(
+                table_path, meta["model_sha256"], FEATURE_ORDER
+            )
+        else:
+            path = os.path.join(out_dir, f"{stem}__{tier}.pkl")
+            joblib.dump(model, path)
+        build_seconds = time.perf_counter() - start
+
+        score = _scorer(model, engine, table)
+        _, metrics = evaluate(score, X_eval, y_eval, eval_proba)
+        size = _size(model, path)
+        if table_path:
+            size["file_mb"] = round(
+                size["file_mb"] + os.path.getsize(table_path) / (1024 * 1024), 2
+            )
+        report["tiers"][tier] = {
+            "path": path,
+            "risk_table": table_path,
+            **metrics,
+            "auc_delta": round(metrics["auc"] - ref_metrics["auc"], 5),
+            "brier_delta": round(metrics["brier"] - ref_metrics["brier"], 5),
+            "ece_delta": round(metrics["ece"] - ref_metrics["ece"], 5),
+            **_latency(score, X_eval, iterations),
+            **size,
+            "build_seconds": round(build_seconds, 2),
+        }
+        logger.info("Tier %s listo en %.1f s", tier, build_seconds)
+    return report
+
+
+def register_tiers(registry: ModelRegistry, parent: str, report: dict) -> list:
+    """Registra cada tier del reporte como "<parent>@<tier>" en el manifiesto."""
+    registered = []
+    for tier, info in report["tiers"].items():
+        version = f"{parent}@{tier}"
+        if version in registry.manifest()["models"]:
+            raise ValueError(f"La versión {version} ya está registrada")
+        table_name = None
+        if info["risk_table"]:
+            # La tabla (y sus metadatos) debe vivir junto al manifiesto
+            table_name = os.path.basename(info["risk_table"])
+            target = os.path.join(registry.models_dir, table_name)
+            if os.path.abspath(info["risk_table"]) != os.path.abspath(target):
+                shutil.copy2(info["risk_table"], target)
+                shutil.copy2(info["risk_table"] + ".json", target + ".json")
+        registry.register(
+            info["path"], version, risk_table=table_name, parent=parent, tier=tier
+        )
+        registered.append(version)
+    return registered
+
+
+def _print_table(report: dict) -> None:
+    header = (
+        f"{'tier':<16}{'AUC Δ':>9}{'Brier Δ':>9}{'ECE Δ':>9}{'|Δp|':>8}"
+        f"{'nivel=':>8}{'p50 ms':>9}{'256 ms':>9}{'MB':>8}"
+    )
+    print(header)
+    ref = report["reference"]
+    print(
+        f"{'referencia':<16}{0:>9.4f}{0:>9.4f}{0:>9.4f}{0:>8.4f}{1:>8.3f}"
+        f"{ref['single_p50_ms']:>9.3f}{ref['batch256_ms']:>9.3f}{ref['file_mb']:>8.2f}"
+    )
+    for tier, t in report["tiers"].items():
+        print(
+            f"{tier:<16}{t['auc_delta']:>9.4f}{t['brier_delta']:>9.4f}"
+            f"{t['ece_delta']:>9.4f}{t['mean_abs_diff']:>8.4f}"
+            f"{t['risk_level_agreement']:>8.3f}{t['single_p50_ms']:>9.3f}"
+            f"{t['batch256_ms']:>9.3f}{t['file_mb']:>8.2f}"
+        )
+
+
+def main(argv=None):
+    from core.config import settings
+
+    parser = argparse.ArgumentParser(
+        description="Deriva variantes ligeras del modelo y mide su costo/precisión."
+    )
+    parser.add_argument("--models-dir", default=settings.ML_MODELS_DIR)
+    parser.add_argument(
+        "--model", default=None, help="Modelo de referencia (por defecto, el activo)"
+    )
+    parser.add_argument("--parent", default=None, help="Versión de referencia")
+    parser.add_argument("--tiers", nargs="+", required=True)
+    parser.add_argument("--out-dir", default=None)
+    parser.add_argument("--data", default=None, help=".npz con X (y opcional y)")
+    parser.add_argument("--train-size", type=int, default=200_000)
+    parser.add_argument("--eval-size", type=int, default=50_000)
+    parser.add_argument("--engine", default="compiled", choices=["sklearn", "compiled"])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--report", default=None, help="Guarda el reporte en JSON")
+    parser.add_argument("--register", action="store_true")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.models_dir)
+    parent = args.parent
+    model_path = args.model
+    if model_path is None:
+        entry = registry.resolve(parent)
+        if entry is None:
+            parser.error("No hay versión activa en el registro; use --model")
+        model_path, parent = entry["path"], entry["version"]
+    if args.register and not parent:
+        parser.error("--register requiere --parent (o un modelo del registro)")
+
+    report = build_report(
+        model_path,
+        args.tiers,
+        args.out_dir or args.models_dir,
+        data_path=args.data,
+        n_train=args.train_size,
+        n_eval=args.eval_size,
+        engine=args.engine,
+        iterations=args.iterations,
+    )
+    _print_table(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+    if args.register:
+        for version in register_tiers(registry, parent, report):
+            print(f"Registrado {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # schemas/schemas.py (ACTUALIZADO Y CORREGIDO)
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 from enum import Enum  # <- ADD
 
@@ -80,6 +80,8 @@ class EvaluationResponse(BaseModel):
     daily_physical_activity: bool
     has_high_cholesterol: bool
     diabetes_diagnosis: DiabetesDiagnosis
+    model_version: Optional[str] = None
+    feature_contributions: Optional[Dict[str, float]] = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -91,10 +93,79 @@ class EvaluationHistoryResponse(EvaluationResponse):
     pass
 
 
+class EvaluationBatchCreate(BaseModel):
+    """
+    Lote de evaluaciones (campañas de tamizaje). Cada ítem se valida por
+    separado para poder reportar errores sin rechazar todo el lote.
+    """
+
+    items: List[dict] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Cada ítem sigue el esquema EvaluationCreate.",
+    )
+
+
+class EvaluationBatchError(BaseModel):
+    index: int
+    detail: str
+
+
+class EvaluationBatchResponse(BaseModel):
+    created: List[EvaluationResponse]
+    errors: List[EvaluationBatchError]
+
+
+class EvaluationChanges(BaseModel):
+    """
+    Escenario hipotético sobre la última evaluación: solo se indican los
+    campos que cambian. `weight_delta_kg` suma (o resta) al peso.
+    """
+
+    label: Optional[str] = None
+    weight_kg: Optional[float] = Field(None, gt=0)
+    weight_delta_kg: Optional[float] = None
+    height_cm: Optional[float] = Field(None, gt=0)
+    reduces_salt_intake: Optional[bool] = None
+    alcohol_in_last_30_days: Optional[bool] = None
+    smoking_habit: Optional[SmokingHabit] = None
+    e_cigarette_use: Optional[ECigaretteUse] = None
+    stress_days_last_month: Optional[int] = Field(None, ge=0, le=30)
+    daily_physical_activity: Optional[bool] = None
+    has_high_cholesterol: Optional[bool] = None
+    diabetes_diagnosis: Optional[DiabetesDiagnosis] = None
+
+
+class SimulationRequest(BaseModel):
+    scenarios: List[EvaluationChanges] = Field(..., min_length=1, max_length=50)
+
+
+class SimulationResult(BaseModel):
+    label: Optional[str] = None
+    changes: dict
+    probability: float
+    risk_level: str
+    imc: float
+    delta: float  # probability - probabilidad de referencia
+
+
+class SimulationResponse(BaseModel):
+    evaluation_id: int
+    model_version: Optional[str] = None
+    baseline: SimulationResult
+    scenarios: List[SimulationResult]
+
+
 # --- Esquemas para Autenticación (Sin cambios) ---
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -141,6 +212,8 @@ class RiskFactorBase(BaseModel):
     recommendations: List[str]
     level: str
     icon_key: str
+    # Aporte de la feature a la probabilidad según el modelo (si se guardó)
+    contribution: Optional[float] = None
 
     class Config:
         orm_mode = True
@@ -0,0 +1,266 @@
+"""
+Benchmark de inferencia de HypertensionPredictor.
+
+El .pkl de producción no está en el repositorio, así que se entrena
+localmente un random forest de la misma forma (11 features enteras, mismos
+dominios) sobre datos sintéticos y se mide con él:
+
+- latencia p50/p95/p99 de `predict` (una evaluación),
+- latencia y throughput de `predict_batch`,
+- costo de la codificación de features (individual y por lote),
+
+para cada motor de inferencia (sklearn y compilado). Los resultados se
+guardan en JSON y pueden compararse contra una línea base; una regresión
+mayor a la tolerancia termina con código de salida 1.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_predictor.py --out bench.json
+    python benchmarks/bench_predictor.py --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app")
+sys.path.insert(0, os.path.abspath(APP_DIR))
+
+# Settings exige SECRET_KEY aunque aquí no se use
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+
+from ml.encoder import FeatureEncoder  # noqa: E402
+from ml.predictor import HypertensionPredictor  # noqa: E402
+from schemas.schemas import (  # noqa: E402
+    DiabetesDiagnosis,
+    ECigaretteUse,
+    EvaluationCreate,
+    SmokingHabit,
+)
+
+# Métricas comparadas contra la línea base: (nombre, mayor_es_mejor)
+TRACKED = [
+    ("predict.p95_ms", False),
+    ("predict.p99_ms", False),
+    ("predict_batch.p50_ms", False),
+    ("predict_batch.rows_per_s", True),
+    ("encode_single.p50_ms", False),
+    ("encode_batch.p50_ms", False),
+]
+
+
+def train_stand_in(n_estimators: int, max_depth, n_samples: int, seed: int):
+    """Forest con la forma del modelo real, entrenado sobre datos sintéticos."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack(
+        [
+            rng.integers(1, 14, n_samples),  # Age
+            rng.integers(0, 2, n_samples),  # Sex
+            rng.integers(15, 50, n_samples),  # BMI
+            rng.integers(0, 2, n_samples),  # Salt
+            rng.integers(0, 2, n_samples),  # PhysActivity
+            rng.integers(1, 5, n_samples),  # Smoker
+            rng.integers(0, 31, n_samples),  # MentHlth
+            rng.integers(0, 2, n_samples),  # Alcohol
+            rng.integers(1, 5, n_samples),  # Vaper
+            rng.integers(0, 2, n_samples),  # Diabetes
+            rng.integers(0, 2, n_samples),  # HighChol
+        ]
+    ).astype(float)
+    logit = (
+        -4
+        + 0.25 * X[:, 0]
+        + 0.08 * (X[:, 2] - 25)
+        + 0.8 * X[:, 10]
+        + 0.7 * X[:, 9]
+        - 0.3 * X[:, 4]
+        + 0.03 * X[:, 6]
+    )
+    y = (rng.random(n_samples) < 1 / (1 + np.exp(-logit))).astype(int)
+    model = RandomForestClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, random_state=seed
+    )
+    return model.fit(X, y)
+
+
+def synthetic_requests(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+
+    def pick(options):
+        options = list(options)
+        return options[rng.integers(len(options))]
+
+    items = []
+    for _ in range(n):
+        user = {
+            "birth_date": f"{rng.integers(1940, 2005)}-{rng.integers(1, 13):02d}-15",
+            "gender": pick(["Hombre", "Mujer"]),
+        }
+        evaluation = EvaluationCreate(
+            weight_kg=float(rng.uniform(45, 130)),
+            height_cm=float(rng.uniform(150, 195)),
+            reduces_salt_intake=bool(rng.integers(0, 2)),
+            alcohol_in_last_30_days=bool(rng.integers(0, 2)),
+            smoking_habit=pick(SmokingHabit),
+            e_cigarette_use=pick(ECigaretteUse),
+            stress_days_last_month=int(rng.integers(0, 31)),
+            daily_physical_activity=bool(rng.integers(0, 2)),
+            has_high_cholesterol=bool(rng.integers(0, 2)),
+            diabetes_diagnosis=pick(DiabetesDiagnosis),
+        )
+        items.append((user, evaluation))
+    return items
+
+
+def _timed(fn, iterations: int, warmup: int = 5) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+
+    def pct(q):
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))], 4)
+
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+
+
+def run(args) -> dict:
+    model = train_stand_in(
+        args.n_estimators, args.max_depth, args.train_samples, args.seed
+    )
+    items = synthetic_requests(max(args.batch_size, 1000), args.seed + 1)
+    batch = items[: args.batch_size]
+    encoder = FeatureEncoder()
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {
+            "n_estimators": args.n_estimators,
+            "max_depth": args.max_depth,
+            "batch_size": args.batch_size,
+            "iterations": args.iterations,
+        },
+        "encode_single": _timed(
+            lambda: encoder.encode_pairs(items[:1]), args.iterations * 10
+        ),
+        "encode_batch": _timed(
+            lambda: encoder.encode_pairs(batch), args.iterations
+        ),
+        "engines": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "stand_in.pkl")
+        joblib.dump(model, model_path)
+        for engine in args.engines:
+            # Sin caché: se mide el modelo, no los aciertos de la caché
+            predictor = HypertensionPredictor(model_path, engine=engine, cache_size=0)
+            cursor = iter(range(10**9))
+
+            def single():
+                user, evaluation = items[next(cursor) % len(items)]
+                predictor.predict(user, evaluation)
+
+            predict = _timed(single, args.iterations)
+            predict_batch = _timed(
+                lambda: predictor.predict_batch(batch), max(args.iterations // 10, 20)
+            )
+            predict_batch["rows_per_s"] = round(
+                args.batch_size / (predict_batch["mean_ms"] / 1000), 1
+            )
+            results["engines"][engine] = {
+                "effective_engine": predictor.engine,
+                "predict": predict,
+                "predict_batch": predict_batch,
+            }
+    return results
+
+
+def _flatten(results: dict) -> dict:
+    """Métricas rastreadas como {"[<motor>/]<métrica>": valor}."""
+    scopes = [("", results)]
+    scopes += [(f"{engine}/", data) for engine, data in results["engines"].items()]
+    flat = {}
+    for prefix, scope in scopes:
+        for name, _ in TRACKED:
+            section, key = name.split(".")
+            if key in scope.get(section, {}):
+                flat[prefix + name] = scope[section][key]
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    higher_is_better = dict(TRACKED)
+    regressions = []
+    base_flat, cur_flat = _flatten(baseline), _flatten(current)
+    for key, value in cur_flat.items():
+        if key not in base_flat or not base_flat[key]:
+            continue
+        ref = base_flat[key]
+        ratio = value / ref
+        better = higher_is_better[key.rsplit("/", 1)[-1]]
+        worse = ratio < 1 - tolerance if better else ratio > 1 + tolerance
+        print(f"{key:40s} base={ref:>12.4f} actual={value:>12.4f} ({ratio:.2f}x)")
+        if worse:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de HypertensionPredictor.")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--train-samples", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--engines", nargs="+", default=["sklearn", "compiled"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Guarda los resultados en JSON")
+    parser.add_argument("--baseline", default=None, help="JSON de referencia")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Regresión relativa permitida frente a la línea base",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"REGRESIÓN (> {args.tolerance:.0%}): {', '.join(regressions)}")
+            sys.exit(1)
+        print("Sin regresiones frente a la línea base.")
+
+
+if __name__ == "__main__":
+    main()